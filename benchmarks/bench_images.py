@@ -0,0 +1,70 @@
+"""
+Text extraction on image-heavy synthetic PDFs: PyMuPDF's default "dict"
+flags (image blocks with their payloads) against scraper.TEXT_ONLY_FLAGS.
+
+    python -m benchmarks.bench_images [--pages N] [--repeat N]
+"""
+import argparse
+import time
+import tracemalloc
+
+import fitz
+
+from benchmarks.synthetic import make_pdf
+from modules.scraper import TEXT_ONLY_FLAGS
+
+CASES = {
+    "text only": dict(images_per_page=0),
+    "2 images / page": dict(images_per_page=2),
+    "6 images / page": dict(images_per_page=6),
+    "6 large images / page": dict(images_per_page=6, image_size=800),
+}
+
+
+def text_spans(doc, flags):
+    spans = []
+    for page in doc:
+        for block in page.get_text("dict", flags=flags)["blocks"]:
+            if block["type"] != 0:
+                continue
+            for line in block["lines"]:
+                spans.extend((span["text"], tuple(span["bbox"]), span["font"]) for span in line["spans"])
+    return spans
+
+
+def measure(pdf_bytes, flags, repeat):
+    """(best seconds, peak traced bytes, spans) of extracting every page."""
+    best = float("inf")
+    for _ in range(repeat):
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            start = time.perf_counter()
+            spans = text_spans(doc, flags)
+            best = min(best, time.perf_counter() - start)
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        tracemalloc.start()
+        text_spans(doc, flags)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, spans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'case':24} {'PDF MB':>7} {'default ms':>11} {'text ms':>9} {'speedup':>8}"
+          f" {'default MB':>11} {'text MB':>8}")
+    for name, params in CASES.items():
+        pdf_bytes = make_pdf(args.pages, **params)
+        old_s, old_peak, old_spans = measure(pdf_bytes, fitz.TEXTFLAGS_DICT, args.repeat)
+        new_s, new_peak, new_spans = measure(pdf_bytes, TEXT_ONLY_FLAGS, args.repeat)
+        assert old_spans == new_spans
+        print(f"{name:24} {len(pdf_bytes) / 2**20:7.1f} {old_s * 1e3:11.1f} {new_s * 1e3:9.1f} {old_s / new_s:7.1f}x"
+              f" {old_peak / 2**20:11.1f} {new_peak / 2**20:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
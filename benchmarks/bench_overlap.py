@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for the fragment overlap routine used by
+cleaner.join_fragments and yaxis_merger._merge_text_overlap.
+
+    python -m benchmarks.bench_overlap [--repeat N]
+"""
+import argparse
+import random
+import timeit
+
+from modules.text_overlap import overlap_length
+
+
+def endswith_overlap(a, b):
+    # The previous implementation, kept as the reference.
+    for j in range(min(len(a), len(b)), 0, -1):
+        if a.endswith(b[:j]):
+            return j
+    return 0
+
+
+def join(texts, overlap):
+    result = texts[0]
+    for text in texts[1:]:
+        result += text[overlap(result, text):]
+    return result
+
+
+def table_row(rng, cells):
+    return [f"{rng.uniform(0, 99999):,.2f}" for _ in range(cells)]
+
+
+def zero_row(cells):
+    return ["0.00 " * 4] * cells
+
+
+def toc_line(rng, fragments):
+    title = f"{rng.randint(1, 20)}.{rng.randint(1, 9)} Results and discussion "
+    return [title] + ["." * 40] * fragments + [f" {rng.randint(1, 400)}"]
+
+
+def split_with_overlap(text, pieces, overlap):
+    # Fragments that repeat the last `overlap` characters of their predecessor,
+    # as PyMuPDF does for some kerned / duplicated runs.
+    step = max(1, len(text) // pieces)
+    return [text[max(0, i - overlap):i + step] for i in range(0, len(text), step)]
+
+
+def cases(rng):
+    long_text = " ".join(rng.choice(["alpha", "beta", "gamma", "delta"]) for _ in range(400))
+    return {
+        "table row, 200 numeric cells": table_row(rng, 200),
+        "table row, 200 repeated zero cells": zero_row(200),
+        "TOC line, dot leaders": toc_line(rng, 30),
+        "long line, overlapping fragments": split_with_overlap(long_text, 60, 6),
+        "long line, whole-line fragments": [long_text, long_text[-300:] + " tail"],
+        # Worst case for the endswith scan: every length nearly matches.
+        "periodic near-miss (worst case)": ["ab" * 10000, "ab" * 5000 + "c" + "ab" * 4999],
+        "periodic near-miss, aligned tail": ["ab" * 10000, "ab" * 5000 + "cb" + "ab" * 4999],
+        "single-letter near-miss": ["a" * 20000, "a" * 10000 + "b" + "a" * 9999],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'case':40} {'endswith us':>12} {'overlap us':>12} {'speedup':>8}")
+    for name, texts in cases(rng).items():
+        assert join(texts, endswith_overlap) == join(texts, overlap_length)
+        old = timeit.timeit(lambda: join(texts, endswith_overlap), number=args.repeat) / args.repeat
+        new = timeit.timeit(lambda: join(texts, overlap_length), number=args.repeat) / args.repeat
+        print(f"{name:40} {old * 1e6:12.1f} {new * 1e6:12.1f} {old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
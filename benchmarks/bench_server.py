@@ -0,0 +1,81 @@
+"""
+Load generator for the HTTP outline service (python main.py --serve).
+
+    python -m benchmarks.bench_server PDF [PDF ...] [--url URL] [--clients N] [--requests N]
+
+Each client thread POSTs the given PDFs round-robin and the run reports
+throughput, latency percentiles and how many requests were refused (503).
+"""
+import argparse
+import itertools
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/pdf"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdfs", nargs="+")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/outline")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    bodies = []
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            bodies.append(f.read())
+
+    tickets = itertools.count()
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+
+    def client(worker):
+        for body in itertools.cycle(bodies[worker % len(bodies):] + bodies[:worker % len(bodies)]):
+            if next(tickets) >= args.requests:
+                return
+            start = time.perf_counter()
+            status = post(args.url, body)
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies.sort()
+    print(f"requests {sum(statuses.values())} in {wall:.2f}s, statuses {dict(sorted(statuses.items()))}")
+    print(f"throughput {len(latencies) / wall:.1f} outlines/s")
+    for pct in (50, 90, 99):
+        print(f"p{pct:<3} {percentile(latencies, pct) * 1000:9.1f} ms")
+    if latencies:
+        print(f"max  {latencies[-1] * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Per-stage benchmark of the pipeline on synthetic PDFs.
+
+    python -m benchmarks.bench_stages [--repeat N] [--output FILE] [--compare OLD_FILE]
+
+Every case is generated in memory (benchmarks.synthetic) and run through
+pipeline.STAGES, timing each stage on its own: extract (extract_span_table),
+clean (clean_and_merge), merge (merge_engine.sweep_merge, formerly the
+yaxis_merge, line_merge and line_consolidate stages), filter, index, title
+(mark_title), headers
+(extract_h1_headers), h1_refine (refine_h1_headers) and hierarchy
+(build_header_hierarchy). The best of --repeat runs is kept per stage and
+the results are written as JSON, which --compare diffs against an older run.
+"""
+import argparse
+import json
+import platform
+import time
+
+import fitz
+
+from benchmarks.synthetic import make_pdf
+from modules.pipeline import STAGES
+
+CASES = {
+    "short, sparse headings": dict(pages=5, heading_density=0.05),
+    "short, dense headings": dict(pages=5, heading_density=0.3),
+    "medium, multi-font lines": dict(pages=40, multi_font=0.5),
+    "medium, TOC pages": dict(pages=40, toc_pages=4),
+    "long, headers and footers": dict(pages=150),
+    "long, no headers or footers": dict(pages=150, header_footer=False),
+}
+
+
+def span_count(spans):
+    return len(spans) if spans is not None else 0
+
+
+def time_stages(pdf_bytes):
+    """[(stage, seconds, spans in, spans out)] of one run over every stage."""
+    state = {"source": pdf_bytes}
+    timings = []
+    for name, stage in STAGES:
+        spans_in = span_count(state.get("spans"))
+        start = time.perf_counter()
+        stage(state)
+        timings.append((name, time.perf_counter() - start, spans_in, span_count(state.get("spans"))))
+    return timings
+
+
+def run_case(params, repeat):
+    pdf_bytes = make_pdf(**params)
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        pages = doc.page_count
+
+    best = None
+    for _ in range(repeat):
+        timings = time_stages(pdf_bytes)
+        if best is None:
+            best = timings
+        else:
+            best = [min(old, new, key=lambda t: t[1]) for old, new in zip(best, timings)]
+
+    stages = []
+    for name, seconds, spans_in, spans_out in best:
+        spans = spans_in or spans_out  # extraction has no input spans
+        stages.append({
+            "stage": name,
+            "seconds": seconds,
+            "spans_in": spans_in,
+            "spans_out": spans_out,
+            "spans_per_sec": spans / seconds if seconds and spans else None,
+            "pages_per_sec": pages / seconds if seconds else None,
+        })
+    return {"params": params, "pages": pages, "total_seconds": sum(s["seconds"] for s in stages), "stages": stages}
+
+
+def compare(results, old_path):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)["cases"]
+    print(f"\n{'case / stage':52} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for case, result in results.items():
+        if case not in old:
+            continue
+        old_stages = {s["stage"]: s["seconds"] for s in old[case]["stages"]}
+        for stage in result["stages"]:
+            before = old_stages.get(stage["stage"])
+            if before:
+                print(f"{case + ' / ' + stage['stage']:52} {before * 1e3:10.2f} "
+                      f"{stage['seconds'] * 1e3:10.2f} {stage['seconds'] / before - 1:+8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_stages.json")
+    parser.add_argument("--compare", default=None, help="earlier --output file to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    for case, params in CASES.items():
+        result = results[case] = run_case(params, args.repeat)
+        print(f"{case} ({result['pages']} pages): {result['total_seconds'] * 1e3:.1f} ms")
+        for stage in result["stages"]:
+            spans_rate = f"{stage['spans_per_sec']:12,.0f}" if stage["spans_per_sec"] else f"{'-':>12}"
+            print(f"  {stage['stage']:18} {stage['seconds'] * 1e3:9.2f} ms {stage['spans_in']:7} spans in"
+                  f" {spans_rate} spans/s {stage['pages_per_sec']:10,.0f} pages/s")
+
+    report = {
+        "python": platform.python_version(),
+        "pymupdf": fitz.VersionBind,
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "repeat": args.repeat,
+        "cases": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
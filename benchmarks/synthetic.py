@@ -0,0 +1,94 @@
+"""
+Synthetic PDFs for the benchmarks, generated with PyMuPDF.
+
+make_pdf(pages, ...) returns the bytes of a document with a title page,
+numbered H1/H2/H3 headings at a chosen density, body lines that mix several
+fonts, optional table-of-contents pages with dot leaders and an optional
+header/footer repeated on every page.
+"""
+import random
+
+import fitz
+
+WORDS = ["lorem", "ipsum", "dolor", "sit", "amet", "data", "model", "value", "report", "result"]
+PAGE_TOP, PAGE_BOTTOM = 60, 770
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def _toc_page(page, rng, entries):
+    page.insert_text((50, 80), "Table of Contents", fontsize=18, fontname="hebo")
+    y = 120
+    for n in range(entries):
+        if y > PAGE_BOTTOM:
+            break
+        label = f"{n + 1}. {_words(rng, 3).title()}"
+        page.insert_text((60, y), f"{label} {'.' * (60 - len(label))} {rng.randint(2, 400)}",
+                         fontsize=10, fontname="helv")
+        y += 15
+
+
+def _body_line(page, rng, y, multi_font):
+    if rng.random() < multi_font:
+        # Same line, three runs in different fonts.
+        page.insert_text((50, y), _words(rng, 3), fontsize=10, fontname="helv")
+        page.insert_text((170, y), _words(rng, 2), fontsize=10, fontname="hebo")
+        page.insert_text((260, y), _words(rng, 4), fontsize=10, fontname="tiit")
+    else:
+        page.insert_text((50, y), _words(rng, 12), fontsize=10, fontname="helv")
+
+
+def _insert_images(page, rng, count, size):
+    # Noise does not compress, so every image carries a realistic payload.
+    for i in range(count):
+        pixmap = fitz.Pixmap(fitz.csRGB, size, size, rng.randbytes(size * size * 3), False)
+        column, row = i % 2, i // 2
+        page.insert_image(fitz.Rect(50 + column * 260, 60 + row * 240, 290 + column * 260, 280 + row * 240),
+                          pixmap=pixmap)
+
+
+def make_pdf(pages, heading_density=0.1, multi_font=0.1, toc_pages=0, header_footer=True, seed=0,
+             images_per_page=0, image_size=300):
+    """
+    Bytes of a synthetic document; heading_density / multi_font are per-line
+    probabilities. images_per_page image_size x image_size pictures are
+    placed on every content page (text is written over them).
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    numbers = [0, 0, 0]
+
+    for p in range(pages):
+        page = doc.new_page()
+        if header_footer:
+            page.insert_text((50, 30), "Synthetic Benchmark Report - Confidential", fontsize=8, fontname="helv")
+            page.insert_text((280, 810), f"Page {p + 1}", fontsize=8, fontname="helv")
+        if p == 0:
+            page.insert_text((80, 120), "Synthetic Benchmark Document", fontsize=24, fontname="hebo")
+            continue
+        if p <= toc_pages:
+            _toc_page(page, rng, entries=45)
+            continue
+
+        if images_per_page:
+            _insert_images(page, rng, images_per_page, image_size)
+
+        y = PAGE_TOP
+        while y < PAGE_BOTTOM:
+            if rng.random() < heading_density:
+                level = rng.choice((0, 0, 1, 1, 2))
+                numbers[level] += 1
+                numbers[level + 1:] = [0] * (2 - level)
+                number = ".".join(str(n) for n in numbers[:level + 1])
+                size = (16, 13, 11)[level]
+                page.insert_text((50, y + 6), f"{number} {_words(rng, 3).title()}", fontsize=size, fontname="hebo")
+                y += size + 16
+            else:
+                _body_line(page, rng, y, multi_font)
+                y += 14
+
+    data = doc.tobytes()
+    doc.close()
+    return data
@@ -0,0 +1,91 @@
+"""
+Check merge_engine.sweep_merge against the three-pass chain it replaces,
+merge_on_yaxis_preserve_styles -> merge_lines -> consolidate_lines.
+
+    python -m benchmarks.verify_merge [PDF_OR_DIR ...] [--repeat N]
+
+Every PDF given (directories are searched for *.pdf; input/ by default) and
+the bench_stages synthetic cases are extracted and cleaned, then both
+implementations run on their own deep copy of the spans. The outputs must be
+equal span for span; the exit status is 1 otherwise. Timings of both are
+printed alongside.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+from benchmarks.bench_stages import CASES
+from benchmarks.synthetic import make_pdf
+from modules.line_consolidator import consolidate_lines
+from modules.line_merger import merge_lines
+from modules.merge_engine import sweep_merge
+from modules.pipeline import INPUT_DIR, stage_clean, stage_extract
+from modules.yaxis_merger import merge_on_yaxis_preserve_styles
+
+
+def chain_merge(spans):
+    return consolidate_lines(merge_lines(merge_on_yaxis_preserve_styles(spans)))
+
+
+def pdf_sources(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(".pdf"):
+                    yield name, os.path.join(path, name)
+        else:
+            yield os.path.basename(path), path
+
+
+def best_time(merge, spans, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        spans_copy = copy.deepcopy(spans)
+        start = time.perf_counter()
+        result = merge(spans_copy)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+
+def first_difference(expected, actual):
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            return f"entry {i}: {a!r} != {b!r}"
+    return f"{len(expected)} entries != {len(actual)} entries"
+
+
+def verify(name, source, repeat):
+    state = {"source": source}
+    stage_extract(state)
+    stage_clean(state)
+    spans = state["spans"]
+
+    expected, chain_seconds = best_time(chain_merge, spans, repeat)
+    actual, sweep_seconds = best_time(sweep_merge, spans, repeat)
+    same = expected == actual
+    print(f"{'ok ' if same else 'DIFF'} {name:40} {len(spans):7} spans -> {len(actual):6}"
+          f" {chain_seconds * 1e3:9.2f} ms chain {sweep_seconds * 1e3:9.2f} ms sweep")
+    if not same:
+        print(f"     {first_difference(expected, actual)}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("paths", nargs="*", default=[INPUT_DIR])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sources = [(name, path) for name, path in pdf_sources(p for p in args.paths if os.path.exists(p))]
+    sources += [(f"synthetic: {case}", make_pdf(**params)) for case, params in CASES.items()]
+
+    failures = sum(not verify(name, source, args.repeat) for name, source in sources)
+    print(f"\n{len(sources) - failures}/{len(sources)} documents equivalent")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Check the indexed h1_refiner and hierarchy and the in-memory outline
+post-processing against the scan-based baseline they replaced.
+
+    python -m benchmarks.verify_refine_hierarchy [--documents N] [--outlines N] [--seed S] [--baseline REV]
+
+The baseline modules/h1_refiner.py, hierarchy.py and hierarchy_merger.py
+are loaded from git at REV (by default the last commit before the rewrite)
+and run as they used to, through JSON files. The random documents are
+index-ordered, shuffled, or have a merged title entry inserted at the
+front, as mark_title does; they are checked with
+RegionMaxFont.first_bigger on random regions, with refine_h1_headers on
+random header sets and with build_header_hierarchy on the refined headers.
+Random outlines go through postprocess_outline and through the four
+directory-wide passes run_pipeline used to apply to output/. Every
+result must be equal; the exit status is 1 otherwise.
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import types
+
+from modules.h1_refiner import RegionMaxFont, refine_h1_headers
+from modules.hierarchy import build_header_hierarchy
+from modules.hierarchy_merger import postprocess_outline
+
+# The last commit before the index-based rewrites.
+BASELINE_REV = "2256a0a"
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FONTS = ["Arial", "Arial-Bold", "Helvetica", "Times-Italic", "Courier-Oblique", "Roboto-Condensed"]
+SIZES = [9, 10, 11, 12, 14, 16, 18, 24]
+SIZE_WEIGHTS = [2, 12, 6, 3, 2, 2, 1, 1]  # a dominant body size, as in real documents
+
+
+def load_baseline(rev, name):
+    path = f"modules/{name}.py"
+    source = subprocess.run(
+        ["git", "show", f"{rev}:{path}"], cwd=REPO_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    module = types.ModuleType(f"baseline_{name}")
+    exec(compile(source, f"{rev}:{path}", "exec"), module.__dict__)
+    return module
+
+
+def scan_first_bigger(main_data, region_start, region_end, min_size, excluded):
+    # The linear scan of the baseline promotion loop, kept as the reference.
+    for entry in main_data:
+        idx_in = entry.get('index')
+        if idx_in is not None and region_start <= idx_in < region_end:
+            for style in entry.get('styles_used', []):
+                if style.get('size', 0) > min_size and idx_in not in excluded:
+                    return entry
+    return None
+
+
+def random_style(rng):
+    return {
+        "font": rng.choice(FONTS),
+        "size": rng.choices(SIZES, SIZE_WEIGHTS)[0],
+        "color": rng.choice([0, 0, 0, 255]),
+        "font_flags": {"bold": rng.random() < 0.25, "italic": rng.random() < 0.1, "serif": rng.random() < 0.5},
+    }
+
+
+def random_spans(rng, count):
+    styles = [random_style(rng) for _ in range(rng.randint(1, 12))]
+    spans = []
+    for index in range(count):
+        used = [copy.deepcopy(rng.choice(styles))]
+        if rng.random() < 0.1:
+            used.append(copy.deepcopy(rng.choice(styles)))
+        spans.append({
+            "text": f"Line {rng.randrange(count // 3 + 2)}",
+            "page_number": index // 40 + 1,
+            "position": {"x": rng.randint(50, 300), "y": rng.randint(50, 750), "width": 200, "height": 12},
+            "styles_used": used,
+            "index": index,
+        })
+    return spans
+
+
+def random_document(rng):
+    """(layout, spans) with index-ordered, shuffled or title-inserted spans."""
+    spans = random_spans(rng, rng.randint(1, 400))
+    layout = rng.choice(["ordered", "ordered", "shuffled", "title"])
+    if layout == "shuffled":
+        rng.shuffle(spans)
+    elif layout == "title":
+        # mark_title's merged entry: a copy of a later entry, at the front.
+        title = copy.deepcopy(rng.choice(spans))
+        title["merged_simultaneous"] = True
+        spans.insert(0, title)
+    return layout, spans
+
+
+def random_h1_headers(rng, spans):
+    picked = rng.sample(spans, min(len(spans), rng.randint(0, 10)))
+    return [
+        {"index": s["index"], "text": s["text"], "style": copy.deepcopy(s["styles_used"][0]),
+         "h1_skip": rng.random() < 0.1}
+        for s in picked
+    ]
+
+
+def random_outline(rng):
+    outline, index = [], rng.randint(0, 5)
+    for _ in range(rng.randint(0, 14)):
+        index += rng.choice([1, 1, 2, 5])
+        outline.append({
+            "level": f"H{rng.choices([1, 2, 3, 4], [4, 4, 2, 1])[0]}",
+            "text": f"Heading {rng.randrange(20)}", "page": rng.randint(1, 30), "index": index,
+        })
+    return outline
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def round_trip(data):
+    # The baseline read everything back from JSON.
+    return json.loads(json.dumps(data))
+
+
+def check_region_queries(rng, spans):
+    index = RegionMaxFont(spans)
+    indices = [s["index"] for s in spans]
+    for _ in range(20):
+        start = rng.randint(-1, len(spans))
+        end = rng.choice([start + rng.randint(0, len(spans)), float("inf")])
+        min_size = rng.choice(SIZES)
+        excluded = set(rng.sample(indices, min(len(indices), rng.randint(0, 5))))
+        if index.first_bigger(start, end, min_size, excluded) is not \
+                scan_first_bigger(spans, start, end, min_size, excluded):
+            return f"first_bigger({start}, {end}, {min_size}, {sorted(excluded)})"
+    return None
+
+
+def check_document(baseline, rng, spans, work_dir):
+    """Description of the first difference for one document, or None."""
+    difference = check_region_queries(rng, spans)
+    if difference:
+        return difference
+
+    h1_headers = random_h1_headers(rng, spans)
+    main_path = os.path.join(work_dir, "doc.json")
+    h1_path = os.path.join(work_dir, "h1_doc.json")
+    write_json(main_path, spans)
+    write_json(h1_path, h1_headers)
+    expected = baseline["h1_refiner"].refine_h1_headers_regionally(main_path, h1_path, save=False)
+    refined = refine_h1_headers(copy.deepcopy(spans), copy.deepcopy(h1_headers))
+    if round_trip(refined) != expected:
+        return f"refine_h1_headers: {expected!r} != {refined!r}"
+
+    hierarchy_path = os.path.join(work_dir, "hierarchy_doc.json")
+    if os.path.exists(hierarchy_path):
+        os.remove(hierarchy_path)
+    write_json(h1_path, refined)
+    baseline["hierarchy"].process_header_hierarchy(main_path, work_dir)
+    expected = read_json(hierarchy_path) if os.path.exists(hierarchy_path) else []
+    actual = build_header_hierarchy(copy.deepcopy(spans), copy.deepcopy(refined))
+    if round_trip(actual) != expected:
+        return f"build_header_hierarchy: {expected!r} != {actual!r}"
+    return None
+
+
+def check_outlines(baseline, rng, count, work_dir):
+    """Number of outlines where postprocess_outline differs from the directory passes, and the first one."""
+    outlines = [random_outline(rng) for _ in range(count)]
+    for i, outline in enumerate(outlines):
+        write_json(os.path.join(work_dir, f"{i}.json"), {"title": "", "outline": outline})
+    merger = baseline["hierarchy_merger"]
+    merger.remove_illegal_header_jumps(work_dir)
+    merger.merge_adjacent_headers(work_dir)
+    merger.remove_consecutive_same_level_headers(work_dir)
+    merger.remove_index_attributes(work_dir)
+
+    failures, first = 0, None
+    for i, outline in enumerate(outlines):
+        expected = read_json(os.path.join(work_dir, f"{i}.json"))["outline"]
+        actual = postprocess_outline(copy.deepcopy(outline))
+        if actual != expected:
+            failures += 1
+            first = first or f"outline {outline!r}: {expected!r} != {actual!r}"
+    return failures, first
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--outlines", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=BASELINE_REV, help=f"git revision of the reference (default: {BASELINE_REV})")
+    args = parser.parse_args()
+
+    baseline = {name: load_baseline(args.baseline, name) for name in ("h1_refiner", "hierarchy", "hierarchy_merger")}
+    rng = random.Random(args.seed)
+
+    checked, failed, first = {}, {}, {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for _ in range(args.documents):
+            layout, spans = random_document(rng)
+            difference = check_document(baseline, rng, spans, work_dir)
+            checked[layout] = checked.get(layout, 0) + 1
+            if difference:
+                failed[layout] = failed.get(layout, 0) + 1
+                first.setdefault(layout, difference)
+
+    for layout in sorted(checked):
+        count = failed.get(layout, 0)
+        print(f"{'ok ' if not count else 'DIFF'} {layout + ' documents':40} {checked[layout] - count:6}/{checked[layout]} equivalent")
+        if count:
+            print(f"     {first[layout]}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        outline_failures, outline_first = check_outlines(baseline, rng, args.outlines, work_dir)
+    print(f"{'ok ' if not outline_failures else 'DIFF'} {'outlines':40}"
+          f" {args.outlines - outline_failures:6}/{args.outlines} equivalent")
+    if outline_failures:
+        print(f"     {outline_first}")
+
+    sys.exit(1 if failed or outline_failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,129 @@
-from modules.pipeline import run_pipeline
+import argparse
+import sys
+
+from modules.cache import DEFAULT_CACHE_DIR, DEFAULT_CACHE_SIZE, ResultCache
+from modules.checkpoints import DEFAULT_CHECKPOINT_DIR, DEFAULT_CHECKPOINT_SIZE, CheckpointStore
+from modules.pipeline import DUMP_DIR, INPUT_DIR, OUTPUT_DIR, STAGES, STREAMING_STAGES, run_pipeline, stage_bounds
+from modules.server import DEFAULT_HOST, DEFAULT_PORT, DEFAULT_TIMEOUT, serve
+from modules.watcher import watch_folder
+
+# Batch-run reports; --watch and --serve never finish a batch to report on.
+REPORT_FLAGS = ("metrics", "metrics_prom", "trace_memory", "trace", "profile")
+
+
+def report_watch_failure(pdf_filename, success):
+    if not success:
+        print(f"failed: {pdf_filename}", file=sys.stderr)
+
+
 def main():
-    
-    run_pipeline()
-    
-    
+    parser = argparse.ArgumentParser(description="Extract title and outline from input/*.pdf into output/.")
+    parser.add_argument("--input-dir", default=INPUT_DIR, help=f"Folder of PDFs to process (default: {INPUT_DIR})")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help=f"Folder the outlines are written to (default: {OUTPUT_DIR})")
+    parser.add_argument("--dump", action="store_true",
+                        help="Keep the intermediate stage JSON files for debugging")
+    parser.add_argument("--dump-dir", default=DUMP_DIR, help=f"Folder of the --dump files (default: {DUMP_DIR})")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Number of worker processes (default: CPU count, 1 = serial)")
+    parser.add_argument("--page-jobs", type=int, default=1,
+                        help="Worker processes per document for page-parallel extraction of large PDFs")
+    parser.add_argument("--stream", action="store_true",
+                        help="Extract and merge one page at a time to bound memory on very large PDFs")
+    parser.add_argument("--use-toc", action="store_true",
+                        help="Answer PDFs whose embedded bookmarks pass the quality checks from them, skipping the heuristics")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always reprocess PDFs instead of reusing cached outlines")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory of the outline cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE // (1024 * 1024),
+                        help="Size bound of the outline cache in MB; least recently used entries are evicted")
+    parser.add_argument("--checkpoints", action="store_true",
+                        help="Checkpoint the output of every stage so later runs can resume from it")
+    parser.add_argument("--checkpoint-dir", default=DEFAULT_CHECKPOINT_DIR,
+                        help=f"Directory of the stage checkpoints (default: {DEFAULT_CHECKPOINT_DIR})")
+    parser.add_argument("--checkpoint-size", type=int, default=DEFAULT_CHECKPOINT_SIZE // (1024 * 1024),
+                        help="Size bound of the checkpoint directory in MB; least recently used checkpoints are evicted")
+    parser.add_argument("--from-stage", default=None,
+                        help="Resume at this stage from the checkpoint of the stage before it (implies --checkpoints)")
+    parser.add_argument("--to-stage", default=None,
+                        help="Stop after this stage without writing outlines (implies --checkpoints)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and process PDFs as they appear in input/ using warm worker processes")
+    parser.add_argument("--poll-interval", type=float, default=0.5,
+                        help="Seconds between scans of input/ in --watch mode (default: 0.5)")
+    parser.add_argument("--serve", action="store_true",
+                        help="Run the HTTP outline service (POST PDF bytes to /outline) instead of processing input/")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"--serve bind address (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"--serve port (default: {DEFAULT_PORT})")
+    parser.add_argument("--queue-size", type=int, default=None,
+                        help="--serve requests allowed to wait for a worker before new ones get 503 (default: 2 x jobs)")
+    parser.add_argument("--request-timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help=f"--serve seconds to wait for an outline before answering 504 (default: {DEFAULT_TIMEOUT:g})")
+    parser.add_argument("--metrics", default=None, metavar="FILE",
+                        help="Write per-document / per-stage timing and span-count metrics as JSON")
+    parser.add_argument("--metrics-prom", default=None, metavar="FILE",
+                        help="Also write the metrics as a Prometheus textfile-collector file")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Record each stage's peak Python heap (tracemalloc) in the metrics; slows processing")
+    parser.add_argument("--trace", default=None, metavar="FILE",
+                        help="Write a Trace Event Format timeline (open in Perfetto / chrome://tracing)")
+    parser.add_argument("--profile", default=None, metavar="DIR",
+                        help="cProfile every document and write <name>.prof files plus summary.txt to DIR")
+    parser.add_argument("--profile-threshold", type=float, default=0.0, metavar="SECONDS",
+                        help="With --profile, keep only profiles of documents that took at least this long")
+    parser.add_argument("--profile-top", type=int, default=30, metavar="N",
+                        help="Functions listed per ordering in the --profile summary (default: 30)")
+    args = parser.parse_args()
+
+    try:
+        stage_bounds(STREAMING_STAGES if args.stream else STAGES, args.from_stage, args.to_stage)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.watch or args.serve:
+        for flag in REPORT_FLAGS:
+            if getattr(args, flag):
+                mode = "--watch" if args.watch else "--serve"
+                parser.error(f"--{flag.replace('_', '-')} is not supported with {mode}")
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    checkpoints = None
+    if args.checkpoints or args.from_stage or args.to_stage:
+        checkpoints = CheckpointStore(args.checkpoint_dir, max_bytes=args.checkpoint_size * 1024 * 1024)
+
+    if args.serve:
+        try:
+            serve(args.host, args.port, workers=args.jobs, queue_size=args.queue_size, timeout=args.request_timeout,
+                  options={"stream": args.stream, "use_toc": args.use_toc})
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.watch:
+        options = {
+            "dump_dir": args.dump_dir if args.dump else None, "page_jobs": args.page_jobs,
+            "stream": args.stream, "cache": cache,
+            "checkpoints": checkpoints, "from_stage": args.from_stage, "to_stage": args.to_stage,
+            "use_toc": args.use_toc,
+        }
+        try:
+            watch_folder(args.input_dir, args.output_dir, jobs=args.jobs, interval=args.poll_interval, options=options,
+                         on_result=report_watch_failure)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    run_pipeline(
+        dump=args.dump, jobs=args.jobs, page_jobs=args.page_jobs, stream=args.stream, cache=cache,
+        checkpoints=checkpoints, from_stage=args.from_stage, to_stage=args.to_stage, use_toc=args.use_toc,
+        input_dir=args.input_dir, output_dir=args.output_dir, dump_dir=args.dump_dir,
+        metrics_report=args.metrics, prometheus_textfile=args.metrics_prom, trace_memory=args.trace_memory,
+        trace_file=args.trace,
+        profile_dir=args.profile, profile_threshold=args.profile_threshold, profile_top=args.profile_top,
+    )
+
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+# modules/cache.py
+
+import glob
+import hashlib
+import json
+import os
+import time
+from functools import lru_cache
+
+import fitz
+
+# Bump when a change alters the outlines the pipeline produces in a way the
+# module sources and the PyMuPDF version would not reveal (e.g. another
+# dependency upgrade).
+PIPELINE_VERSION = "1"
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "outlines")
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024  # bytes
+# Temporary files of a put/save older than this were left by a writer that
+# died before its os.replace; younger ones may still be in flight.
+STALE_TMP_SECONDS = 3600
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_digest(source):
+    """SHA-256 of a PDF given as a file path or as an in-memory buffer."""
+    if isinstance(source, (str, os.PathLike)):
+        return file_digest(source)
+    return hashlib.sha256(memoryview(source)).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def code_fingerprint():
+    """Hash of PIPELINE_VERSION, the PyMuPDF version and the sources of every pipeline module."""
+    digest = hashlib.sha256(PIPELINE_VERSION.encode())
+    digest.update(fitz.VersionBind.encode())
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(module_dir, "*.py"))):
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed store of final outlines.
+    Entries are keyed by the PDF's SHA-256 plus the pipeline fingerprint
+    (code_fingerprint, config and the output-affecting options passed to
+    key), so editing a heuristic or changing such an option invalidates them. The directory is
+    kept under max_bytes by evicting the least recently used entries; a hit
+    refreshes the entry's mtime. The directory is scanned once at start-up
+    and then only when a put takes the running size total over the bound.
+    Each process keeps its own total, so with several writers the bound is
+    enforced as soon as one of them crosses it (or evict() is called).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_SIZE, config=None):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.config = dict(config or {})
+        self.total_bytes = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self.evict()  # seeds total_bytes and honours a bound that shrank since the last run
+
+    def __reduce__(self):
+        # Pool workers share one instance per process, so the running total
+        # carries over between the documents a worker handles.
+        return _process_cache, (self.cache_dir, self.max_bytes, json.dumps(self.config, sort_keys=True))
+
+    def fingerprint(self, options=None):
+        config = json.dumps(dict(self.config, **(options or {})), sort_keys=True)
+        return hashlib.sha256((code_fingerprint() + config).encode()).hexdigest()
+
+    def key(self, source, options=None):
+        return hashlib.sha256((source_digest(source) + self.fingerprint(options)).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                final_output = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return final_output
+
+    def put(self, key, final_output):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = json.dumps(final_output).encode("utf-8")
+        try:
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)  # atomic, so concurrent workers never see partial entries
+        self.total_bytes += len(data) - old_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        self.total_bytes = evict_lru(self.cache_dir, ".json", self.max_bytes)
+
+
+def evict_lru(directory, suffix, max_bytes):
+    """
+    Remove the least recently used (oldest mtime) `suffix` files of
+    directory until the rest fit in max_bytes; returns their total size.
+    Stale `<key><suffix>.<pid>.tmp` files (see STALE_TMP_SECONDS) are
+    removed as well.
+    """
+    entries = []
+    stale_before = time.time() - STALE_TMP_SECONDS
+    for name in os.listdir(directory):
+        is_tmp = name.endswith(".tmp") and f"{suffix}." in name
+        if not name.endswith(suffix) and not is_tmp:
+            continue
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        if is_tmp:
+            if stat.st_mtime < stale_before:
+                discard_file(os.path.join(directory, name))
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        discard_file(os.path.join(directory, name))
+        total -= size
+    return total
+
+
+def discard_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=None)
+def _process_cache(cache_dir, max_bytes, config):
+    return ResultCache(cache_dir, max_bytes, json.loads(config))
@@ -0,0 +1,95 @@
+# modules/checkpoints.py
+
+import hashlib
+import json
+import os
+import pickle
+import zlib
+from functools import lru_cache
+
+from modules.cache import discard_file, evict_lru
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(".cache", "checkpoints")
+DEFAULT_CHECKPOINT_SIZE = 1024 * 1024 * 1024  # bytes
+
+
+class CheckpointStore:
+    """
+    On-disk checkpoints of the per-document pipeline state.
+    A checkpoint taken after a stage is keyed by the document hash and the
+    (name, version) of that stage and every stage before it, so bumping one
+    stage's version invalidates its checkpoint and all downstream ones while
+    upstream checkpoints stay usable. Payloads are zlib-compressed pickles;
+    only load checkpoints this tool wrote itself. Like ResultCache, the
+    directory is kept under max_bytes by evicting the least recently used
+    checkpoints, tracking its size in memory between scans.
+    """
+
+    def __init__(self, checkpoint_dir=DEFAULT_CHECKPOINT_DIR, level=1, max_bytes=DEFAULT_CHECKPOINT_SIZE):
+        self.checkpoint_dir = checkpoint_dir
+        self.level = level
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        self.evict()
+
+    def __reduce__(self):
+        # One instance per pool worker process, as for ResultCache.
+        return _process_store, (self.checkpoint_dir, self.level, self.max_bytes)
+
+    @staticmethod
+    def stage_keys(doc_hash, stages, versions):
+        """Key of the checkpoint taken after each of stages, in order."""
+        digest = hashlib.sha256(doc_hash.encode())
+        keys = []
+        for name, _ in stages:
+            digest.update(json.dumps([name, versions[name]]).encode())
+            keys.append(digest.copy().hexdigest())
+        return keys
+
+    def _path(self, key):
+        return os.path.join(self.checkpoint_dir, f"{key}.ckpt")
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            payload = pickle.loads(zlib.decompress(data))
+        except Exception:
+            # Corrupt, truncated, or pickled against classes that have since
+            # moved or changed (AttributeError, ImportError, ...): a miss.
+            discard_file(path)
+            self.total_bytes -= len(data)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def save(self, key, payload):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), self.level)
+        try:
+            old_size = os.stat(path).st_size
+        except OSError:
+            old_size = 0
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.total_bytes += len(data) - old_size
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        self.total_bytes = evict_lru(self.checkpoint_dir, ".ckpt", self.max_bytes)
+
+
+@lru_cache(maxsize=None)
+def _process_store(checkpoint_dir, level, max_bytes):
+    return CheckpointStore(checkpoint_dir, level, max_bytes)
@@ -1,9 +1,15 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
 import json
 
+import numpy as np
+
+from modules.text_overlap import overlap_length
+
 
 def _style_key(style):
     s = style[0]
+    if "style_id" in s:
+        return s["style_id"]
     return (
         s["font"],
         s["size"],
@@ -32,21 +38,42 @@ def remove_cross_page_duplicates(data):
     return [entries[0] for entries in seen.values() if len(entries) == 1]
 
 
+def find_cross_page_duplicates(entries):
+    """
+    Keys (ignoring the page) shared by more than one entry; the entries
+    remove_cross_page_duplicates would drop.
+    """
+    return duplicate_keys(_entry_key(entry, ignore_page=True) for entry in entries)
+
+
+def duplicate_keys(keys):
+    counts = Counter(keys)
+    return {key for key, count in counts.items() if count > 1}
+
+
+def table_entry_key(table, row, text):
+    """_entry_key(..., ignore_page=True) of the entry merge_table_page_rows describes by (row, text)."""
+    return int(table.x[row]), int(table.y[row]), int(table.style[row]), text.strip(), None
+
+
+def drop_keys(entries, keys):
+    return [entry for entry in entries if _entry_key(entry, ignore_page=True) not in keys]
+
+
 def merge_fragments(fragments):
     if not fragments:
         return ""
 
     fragments = sorted(fragments, key=lambda x: x['position']['x'])
-    result = fragments[0]['text']
-
-    for i in range(1, len(fragments)):
-        current_text = fragments[i]['text']
-        overlap = 0
-        max_overlap = min(len(result), len(current_text))
-        for j in range(max_overlap, 0, -1):
-            if result.endswith(current_text[:j]):
-                overlap = j
-                break
+    return join_fragments([fragment['text'] for fragment in fragments])
+
+
+def join_fragments(texts):
+    """Concatenate x-ordered fragment texts, dropping overlapping characters."""
+    result = texts[0]
+
+    for current_text in texts[1:]:
+        overlap = overlap_length(result, current_text)
         result += current_text[overlap:]
     return result
 
@@ -99,6 +126,56 @@ def merge_duplicates_same_page(data):
     return final_entries
 
 
+def merge_table_duplicates_same_page(table):
+    """
+    merge_duplicates_same_page for a SpanTable: de-duplication, line
+    grouping and fragment merging run on the columns one page at a time,
+    and span dicts are only built for the merged entries.
+    """
+    final_entries = []
+    for page in table.iter_pages():
+        final_entries.extend(_merge_table_page(page))
+    return final_entries
+
+
+def _merge_table_page(table):
+    merged = []
+    for row, text in merge_table_page_rows(table):
+        base = table.span(row)
+        base["text"] = text
+        merged.append(base)
+    return merged
+
+
+def merge_table_page_rows(table):
+    """
+    The entries _merge_table_page builds for a one-page table, as
+    (row of the first fragment, merged text) pairs instead of span dicts.
+    """
+    xs = table.x.tolist()
+    ys = table.y.tolist()
+    style_ids = table.style.tolist()
+    buckets = (np.rint(table.y / 5).astype(np.int64) * 5).tolist()  # ~5px y tolerance
+    texts = table.texts
+
+    # The style id stands in for _style_key: equal ids <=> equal styles.
+    seen = set()
+    lines = {}
+    for i in range(len(table)):
+        key = (xs[i], ys[i], style_ids[i], texts[i])
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.setdefault(buckets[i], []).append(i)
+
+    merged = []
+    for rows in lines.values():
+        rows.sort(key=xs.__getitem__)
+        merged.append((rows[0], join_fragments([texts[i] for i in rows])))
+
+    return merged
+
+
 def clean_and_merge(output_path):
     """Legacy function for backward compatibility"""
     with open(output_path, "r", encoding="utf-8") as f:
@@ -11,3 +11,7 @@ def is_garbage(text):
     if len(t) <= 2 and not t.isalpha():  # short junk
         return True
     return False
+
+
+def filter_garbage(spans):
+    return [span for span in spans if not is_garbage(span["text"])]
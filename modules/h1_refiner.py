@@ -1,5 +1,8 @@
 import os
 import json
+from bisect import bisect_left
+
+from modules.tracing import trace_span
 
 
 def get_size_from_style(style):
@@ -25,10 +28,124 @@ def font_signature(style):
     )
 
 
-def refine_h1_headers_regionally(main_json_path, h1_json_path, output_path=None, save=True):
-    main_data = load_json(main_json_path)
-    h1_headers = load_json(h1_json_path)
+class RegionMaxFont:
+    """
+    Range-maximum index over the font sizes of main_data, answering "first
+    entry in [start, end) with a font bigger than X" in O(log N).
+    Entries are split into maximal runs that are ordered by index (a single
+    run unless a merged title was inserted at the front); each run gets a
+    sparse table of the largest style size per entry, and runs are searched
+    in list order so the result matches a linear scan of main_data.
+    """
+
+    def __init__(self, main_data):
+        self.runs = []
+        keys, entries = [], []
+        for entry in main_data:
+            idx_in = entry.get('index')
+            if idx_in is None:
+                continue
+            if keys and idx_in < keys[-1]:
+                self.runs.append(self._build_run(keys, entries))
+                keys, entries = [], []
+            keys.append(idx_in)
+            entries.append(entry)
+        if keys:
+            self.runs.append(self._build_run(keys, entries))
+
+    @staticmethod
+    def _build_run(keys, entries):
+        sizes = [
+            max((style.get('size', 0) for style in entry.get('styles_used', [])), default=float('-inf'))
+            for entry in entries
+        ]
+        # table[k][i] = max(sizes[i:i + 2**k])
+        table = [sizes]
+        width = 1
+        while width * 2 <= len(sizes):
+            prev = table[-1]
+            table.append(list(map(max, prev[:len(prev) - width], prev[width:])))
+            width *= 2
+        return keys, entries, table
+
+    @staticmethod
+    def _range_max(table, lo, hi):
+        k = (hi - lo).bit_length() - 1
+        return max(table[k][lo], table[k][hi - (1 << k)])
 
+    def _first_above(self, table, lo, hi, min_size):
+        if lo >= hi or self._range_max(table, lo, hi) <= min_size:
+            return None
+        left, right = lo, hi - 1
+        while left < right:
+            mid = (left + right) // 2
+            if self._range_max(table, lo, mid + 1) > min_size:
+                right = mid
+            else:
+                left = mid + 1
+        return left
+
+    def first_bigger(self, region_start, region_end, min_size, excluded):
+        """First entry with region_start <= index < region_end, a style bigger than min_size and an index not in excluded."""
+        for keys, entries, table in self.runs:
+            lo = bisect_left(keys, region_start)
+            hi = bisect_left(keys, region_end)
+            pos = self._first_above(table, lo, hi, min_size)
+            while pos is not None:
+                if keys[pos] not in excluded:
+                    return entries[pos]
+                pos = self._first_above(table, pos + 1, hi, min_size)
+        return None
+
+
+def _promote_headers(new_headers, region_index):
+    """One promotion pass: each header is replaced by the first bigger-font entry in its region, if any."""
+    replaced = False
+    output_headers = []
+    header_indices = set(h['index'] for h in new_headers)
+
+    for idx, header in enumerate(new_headers):
+        header_idx = header['index']
+        header_size = get_size_from_style(header['style'])
+
+        if idx + 1 < len(new_headers):
+            next_header = new_headers[idx + 1]
+            next_idx = next_header['index']
+            next_size = get_size_from_style(next_header['style'])
+            region_start = header_idx
+            region_end = next_idx
+            min_size = min(header_size, next_size)
+        else:
+            region_start = header_idx
+            region_end = float('inf')
+            min_size = header_size
+
+        found_bigger = None
+        entry = region_index.first_bigger(region_start, region_end, min_size, header_indices)
+        if entry is not None:
+            for style in entry.get('styles_used', []):
+                entry_size = style.get('size', 0)
+                if entry_size > min_size:
+                    found_bigger = {
+                        "index": entry['index'],
+                        "text": entry.get("text", ""),
+                        "style": style,
+                        "reason": f"Promoted: bigger font {entry_size}>{min_size} in region ({region_start}-{region_end})"
+                    }
+                    break
+
+        if found_bigger:
+           
+            output_headers.append(found_bigger)
+            replaced = True
+        else:
+            output_headers.append(header)
+
+    return output_headers, replaced
+
+
+def refine_h1_headers(main_data, h1_headers):
+    """Promote and merge H1 headers against the in-memory span list."""
     # Initial validity check
     if not h1_headers or not isinstance(h1_headers, list):
        
@@ -46,51 +163,11 @@ def refine_h1_headers_regionally(main_json_path, h1_json_path, output_path=None,
     seen_configs = set()
     iteration_count = 0
     max_iterations = 50  # High safety bound
+    region_index = RegionMaxFont(main_data)  # built once for all iterations
 
     while True:
-        replaced = False
-        output_headers = []
-        header_indices = set(h['index'] for h in new_headers)
-
-        for idx, header in enumerate(new_headers):
-            header_idx = header['index']
-            header_size = get_size_from_style(header['style'])
-
-            if idx + 1 < len(new_headers):
-                next_header = new_headers[idx + 1]
-                next_idx = next_header['index']
-                next_size = get_size_from_style(next_header['style'])
-                region_start = header_idx
-                region_end = next_idx
-                min_size = min(header_size, next_size)
-            else:
-                region_start = header_idx
-                region_end = float('inf')
-                min_size = header_size
-
-            found_bigger = None
-            for entry in main_data:
-                idx_in = entry.get('index')
-                if idx_in is not None and region_start <= idx_in < region_end:
-                    for style in entry.get('styles_used', []):
-                        entry_size = style.get('size', 0)
-                        if entry_size > min_size and idx_in not in header_indices:
-                            found_bigger = {
-                                "index": idx_in,
-                                "text": entry.get("text", ""),
-                                "style": style,
-                                "reason": f"Promoted: bigger font {entry_size}>{min_size} in region ({region_start}-{region_end})"
-                            }
-                            break
-                if found_bigger:
-                    break
-
-            if found_bigger:
-               
-                output_headers.append(found_bigger)
-                replaced = True
-            else:
-                output_headers.append(header)
+        with trace_span("iteration", "h1_refine", iteration=iteration_count, headers=len(new_headers)):
+            output_headers, replaced = _promote_headers(new_headers, region_index)
 
         seen = set()
         deduped = []
@@ -162,6 +239,14 @@ def refine_h1_headers_regionally(main_json_path, h1_json_path, output_path=None,
         }
         merged_headers.append(merged_header)
 
+    return merged_headers
+
+
+def refine_h1_headers_regionally(main_json_path, h1_json_path, output_path=None, save=True):
+    main_data = load_json(main_json_path)
+    h1_headers = load_json(h1_json_path)
+
+    merged_headers = refine_h1_headers(main_data, h1_headers)
     if not merged_headers:
         
         return []
@@ -7,7 +7,8 @@ def get_font_sequence(entry):
     return tuple(style.get("font", "") for style in entry.get("styles_used", []))
 
 
-def legacy_process_header_extraction(data, input_json_path, output_dir):
+def legacy_extract_h1_headers(data):
+    """Fallback H1 detection; returns None when no header list can be derived."""
     # 1. --- Find the Title, Get its index and font sequence ---
     title_index = None
     title_fonts_seq = ()
@@ -25,7 +26,7 @@ def legacy_process_header_extraction(data, input_json_path, output_dir):
         candidate_entries = data
     if not candidate_entries:
         
-        return []
+        return None
     # 2. --- Compute most frequent body size (typical body text size) ---
     all_sizes = [
         style.get("size", 0)
@@ -34,7 +35,7 @@ def legacy_process_header_extraction(data, input_json_path, output_dir):
     ]
     if not all_sizes:
       
-        return []
+        return None
     body_size = Counter(all_sizes).most_common(1)[0][0]
     # 3. --- Filter: Only entries with any style > body_size ---
     filtered_candidates = [
@@ -137,19 +138,33 @@ def legacy_process_header_extraction(data, input_json_path, output_dir):
             "reason": reason
         } for entry, reason in final_h1_entries]
 
+    return header_json
+
+
+def save_h1_headers(header_json, input_json_path, output_dir):
     base_pdf = os.path.splitext(os.path.basename(input_json_path))[0]
     output_path = os.path.join(output_dir, f"h1_{base_pdf}.json")
     with open(output_path, "w", encoding="utf-8") as f_out:
         json.dump(header_json, f_out, indent=2)
-   
+
+
+def legacy_process_header_extraction(data, input_json_path, output_dir):
+    header_json = legacy_extract_h1_headers(data)
+    if header_json is None:
+        return []
+    save_h1_headers(header_json, input_json_path, output_dir)
     return header_json
 
-def process_header_extraction(input_json_path, output_dir):
-    with open(input_json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+
+def extract_h1_headers(data):
+    """
+    Detect H1 headers in an in-memory span list.
+    Returns None when no header list can be derived (no h1 file is written
+    by the file-based wrapper in that case).
+    """
     if not data or not isinstance(data, list):
         
-        return []
+        return None
 
     # --- PRIMARY LOGIC: Most used size is the biggest, select rarest font in single-size/single-font entries ---
     size_counts = Counter()
@@ -159,7 +174,7 @@ def process_header_extraction(input_json_path, output_dir):
 
     if not size_counts:
         
-        return []
+        return None
 
     most_used_size, _ = size_counts.most_common(1)[0]
     global_max_size = max(size_counts.keys())
@@ -183,7 +198,7 @@ def process_header_extraction(input_json_path, output_dir):
 
         if not font_counts:
            
-            return legacy_process_header_extraction(data, input_json_path, output_dir)
+            return legacy_extract_h1_headers(data)
 
         # Pick rarest font (e.g., Bold if rarer than Regular at header size)
         rarest_font, _ = min(font_counts.items(), key=lambda x: x[1])
@@ -210,17 +225,23 @@ def process_header_extraction(input_json_path, output_dir):
                 header_json.append(h)
                 seen_indices.add(h["index"])
 
-        base_pdf = os.path.splitext(os.path.basename(input_json_path))[0]
-        output_path = os.path.join(output_dir, f"h1_{base_pdf}.json")
-        with open(output_path, "w", encoding="utf-8") as f_out:
-            json.dump(header_json, f_out, indent=2)
-        
         return header_json
 
     else:
         # ---- fallback to old logic here ----
        
-        return legacy_process_header_extraction(data, input_json_path, output_dir)
+        return legacy_extract_h1_headers(data)
+
+
+def process_header_extraction(input_json_path, output_dir):
+    with open(input_json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    header_json = extract_h1_headers(data)
+    if header_json is None:
+        return []
+    save_h1_headers(header_json, input_json_path, output_dir)
+    return header_json
 
 # CLI usage
 if __name__ == "__main__":
@@ -1,22 +1,22 @@
 import json
 import os
 import re
+from bisect import bisect_left, bisect_right
 from collections import Counter, OrderedDict
 
+from modules.styles import StyleRegistry
+from modules.tracing import trace_span
 
-def process_header_hierarchy(json_path, output_dir):
-    filename = os.path.splitext(os.path.basename(json_path))[0]
-    h1_path = os.path.join(output_dir, f"h1_{filename}.json")
-    hierarchy_path = os.path.join(output_dir, f"hierarchy_{filename}.json")
-
-    with open(json_path, "r", encoding="utf-8") as f:
-        spans = json.load(f)
-    with open(h1_path, "r", encoding="utf-8") as f:
-        h1_headers = json.load(f)
 
+def build_header_hierarchy(spans, h1_headers, registry=None):
+    """Build the nested header tree below each H1 from in-memory spans."""
     if not h1_headers:
         
-        return
+        return []
+
+    if registry is None:
+        registry = StyleRegistry.from_spans(spans)
+    view = IndexedSpans(spans)
 
     h1_entries = []
     for h in h1_headers:
@@ -34,23 +34,94 @@ def process_header_hierarchy(json_path, output_dir):
     for i, h1 in enumerate(h1_entries):
         start = h1["index"]
         end = h1_entries[i + 1]["index"] if i + 1 < len(h1_entries) else float("inf")
-        region = [s for s in spans if start < s.get("index", -1) < end]
-        children = _build_hierarchy(region, parent_level=1)
+        lo, hi = view.region(start, end)
+        children = _build_level(view, lo, hi, parent_level=1, registry=registry)
         h1["children"] = _deduplicate_tree(children)
 
+    return h1_entries
+
+
+def process_header_hierarchy(json_path, output_dir):
+    filename = os.path.splitext(os.path.basename(json_path))[0]
+    h1_path = os.path.join(output_dir, f"h1_{filename}.json")
+    hierarchy_path = os.path.join(output_dir, f"hierarchy_{filename}.json")
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        spans = json.load(f)
+    with open(h1_path, "r", encoding="utf-8") as f:
+        h1_headers = json.load(f)
+
+    h1_entries = build_header_hierarchy(spans, h1_headers)
+    if not h1_entries:
+        
+        return
+
     with open(hierarchy_path, "w", encoding="utf-8") as f:
         json.dump(h1_entries, f, indent=2, ensure_ascii=False)
     
 
 
-def _build_hierarchy(spans, parent_level):
-    if not spans:
+class IndexedSpans:
+    """
+    Spans ordered by their "index" for region lookups.
+    A region is a (lo, hi) position range into that order, found by bisect;
+    iterating it yields the spans in their original list order without
+    copying the list (spans are already index-ordered unless a merged title
+    entry was inserted at the front).
+    """
+
+    def __init__(self, spans):
+        keys = [s.get("index", -1) for s in spans]
+        self.spans = spans
+        if all(a <= b for a, b in zip(keys, keys[1:])):
+            self.order = None
+            self.keys = keys
+        else:
+            self.order = sorted(range(len(spans)), key=keys.__getitem__)
+            self.keys = [keys[i] for i in self.order]
+
+    def __len__(self):
+        return len(self.spans)
+
+    def region(self, start, end, lo=0, hi=None):
+        """Positions of spans with start < index < end, within [lo, hi)."""
+        if hi is None:
+            hi = len(self.keys)
+        return bisect_right(self.keys, start, lo, hi), bisect_left(self.keys, end, lo, hi)
+
+    def iter(self, lo, hi):
+        if self.order is None:
+            spans = self.spans
+            for i in range(lo, hi):
+                yield spans[i]
+        else:
+            # Nearly sorted, so this sort is linear in practice.
+            for i in sorted(self.order[lo:hi]):
+                yield self.spans[i]
+
+
+def _build_hierarchy(spans, parent_level, registry=None):
+    view = IndexedSpans(spans)
+    return _build_level(view, 0, len(view), parent_level, registry)
+
+
+def _build_level(view, lo, hi, parent_level, registry=None):
+    if lo >= hi:
         return []
+    with trace_span("level", "hierarchy", level=parent_level + 1, spans=hi - lo):
+        return _collect_level(view, lo, hi, parent_level, registry)
+
+
+def _collect_level(view, lo, hi, parent_level, registry=None):
+    """Headers of one level within view[lo:hi], each with its sub-levels (via _build_level)."""
+    if registry is None:
+        registry = StyleRegistry.from_spans(view.spans)
+    traits = registry.traits_of
 
     plain_sizes = [st.get("size", 0)
-                   for s in spans for st in s.get("styles_used", [])
-                   if not st.get("font_flags", {}).get("bold", False)
-                   and not st.get("font_flags", {}).get("italic", False)]
+                   for s in view.iter(lo, hi) for st in s.get("styles_used", [])
+                   if not traits(st).bold
+                   and not traits(st).italic]
     if not plain_sizes:
         return []
     body_size = Counter(plain_sizes).most_common(1)[0][0]
@@ -58,21 +129,11 @@ def _build_hierarchy(spans, parent_level):
     def is_candidate(s):
         for st in s.get("styles_used", []):
             sz = st.get("size", 0)
-            font_name = st.get("font", "").lower()
 
             if sz > body_size:
                 return True
 
-            is_styled = (
-                st.get("font_flags", {}).get("bold", False) or
-                st.get("font_flags", {}).get("italic", False) or
-                any(term in font_name for term in [
-                    "bold", "black", "heavy", "oblique", "italic",
-                    "narrow", "semi", "demi", "compressed", "condensed"
-                ])
-            )
-
-            if sz == body_size and is_styled:
+            if sz == body_size and traits(st).styled:
                 return True
         return False
 
@@ -80,18 +141,10 @@ def _build_hierarchy(spans, parent_level):
         styles = span.get("styles_used", [])
         if len(styles) <= 1:
             return False
-        normalized = set()
-        for st in styles:
-            key = (
-                st.get("size", 0),
-                st.get("font", ""),
-                st.get("font_flags", {}).get("bold", False),
-                st.get("font_flags", {}).get("italic", False)
-            )
-            normalized.add(key)
+        normalized = set(traits(st).shape for st in styles)
         return len(normalized) > 1
 
-    cands = [s for s in spans if is_candidate(s) and not has_mixed_styles(s)]
+    cands = [s for s in view.iter(lo, hi) if is_candidate(s) and not has_mixed_styles(s)]
     if not cands:
         return []
 
@@ -99,12 +152,7 @@ def _build_hierarchy(spans, parent_level):
     style_buckets = OrderedDict()
     for s in cands:
         for st in s.get("styles_used", []):
-            style_key = (
-                st.get("size", 0),
-                st.get("font", ""),
-                st.get("font_flags", {}).get("bold", False),
-                st.get("font_flags", {}).get("italic", False)
-            )
+            style_key = traits(st).shape
             if style_key not in style_buckets:
                 style_buckets[style_key] = None  # preserve order
 
@@ -118,24 +166,13 @@ def _build_hierarchy(spans, parent_level):
     for s in cands:
         for st in s.get("styles_used", []):
             idx = s.get("index")
-            key = (
-                s.get("text", "").strip(),
-                st.get("size", 0),
-                st.get("font", ""),
-                st.get("font_flags", {}).get("bold", False),
-                st.get("font_flags", {}).get("italic", False)
-            )
+            style_key = traits(st).shape
+            key = (s.get("text", "").strip(),) + style_key
             if idx in seen_idx or key in seen_keys:
                 continue
             seen_idx.add(idx)
             seen_keys.add(key)
 
-            style_key = (
-                st.get("size", 0),
-                st.get("font", ""),
-                st.get("font_flags", {}).get("bold", False),
-                st.get("font_flags", {}).get("italic", False)
-            )
             lvl = style_to_level.get(style_key, parent_level + 1)
             text = s.get("text", "").strip()
 
@@ -165,8 +202,8 @@ def _build_hierarchy(spans, parent_level):
             if this_level[j]["level"] <= hdr["level"]:
                 end = this_level[j]["index"]
                 break
-        region = [sp for sp in spans if start < sp.get("index", -1) < end]
-        hdr["children"] = _build_hierarchy(region, parent_level=hdr["level"])
+        sub_lo, sub_hi = view.region(start, end, lo, hi)
+        hdr["children"] = _build_level(view, sub_lo, sub_hi, parent_level=hdr["level"], registry=registry)
         result.append(hdr)
 
     return _truncate_repeats(result)
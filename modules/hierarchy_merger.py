@@ -2,148 +2,139 @@ import os
 import json
 
 
-def merge_adjacent_headers(output_dir):
-    files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
-
-    for file in files:
-        file_path = os.path.join(output_dir, file)
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        outline = data.get("outline", [])
-        if not outline:
-            continue
-
-        blocks = []
-        current_block = []
-
-        for item in outline:
-            level = int(item['level'][1])
-            if level == 1:
-                if current_block:
-                    blocks.append(current_block)
-                current_block = [item]
+def promote_adjacent_headers(outline):
+    blocks = []
+    current_block = []
+
+    for item in outline:
+        level = int(item['level'][1])
+        if level == 1:
+            if current_block:
+                blocks.append(current_block)
+            current_block = [item]
+        else:
+            current_block.append(item)
+    if current_block:
+        blocks.append(current_block)
+
+    should_promote_all = True
+
+    for block in blocks:
+        if len(block) < 2:
+            should_promote_all = False
+            break
+        h1 = block[0]
+        h2 = block[1]
+        if not (h1["level"] == "H1" and h2["level"] == "H2"):
+            should_promote_all = False
+            break
+        if h2.get("index", -1) != h1.get("index", -2) + 1:
+            should_promote_all = False
+            break
+
+    if not should_promote_all:
+        return outline
+
+    for item in outline:
+        level_num = int(item["level"][1])
+        item["level"] = f"H{max(1, level_num - 1)}"
+
+    return outline
+
+
+def strip_index_attributes(outline):
+    for item in outline:
+        if "index" in item:
+            del item["index"]
+    return outline
+
+
+def drop_consecutive_same_level_headers(outline):
+    cleaned_outline = []
+    i = 0
+    while i < len(outline):
+        current = outline[i]
+        cleaned_outline.append(current)
+        j = i + 1
+
+        while j < len(outline) and outline[j]["level"] == current["level"]:
+            if outline[j]["index"] == outline[j - 1]["index"] + 1:
+                j += 1
             else:
-                current_block.append(item)
-        if current_block:
-            blocks.append(current_block)
-
-        should_promote_all = True
-
-        for block in blocks:
-            if len(block) < 2:
-                should_promote_all = False
-                break
-            h1 = block[0]
-            h2 = block[1]
-            if not (h1["level"] == "H1" and h2["level"] == "H2"):
-                should_promote_all = False
-                break
-            if h2.get("index", -1) != h1.get("index", -2) + 1:
-                should_promote_all = False
-                break
-
-        if not should_promote_all:
-            continue
+                cleaned_outline.append(outline[j])
+                j += 1
+        i = j
 
-        for item in outline:
-            level_num = int(item["level"][1])
-            item["level"] = f"H{max(1, level_num - 1)}"
+    return cleaned_outline
 
-        data["outline"] = outline
 
-        with open(file_path, "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+def drop_illegal_header_jumps(outline):
+    cleaned_outline = []
+    previous_level = 0
 
+    for item in outline:
+        current_level = int(item["level"][1])
 
-def remove_index_attributes(output_dir):
-    files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
+        if previous_level == 0:
+            cleaned_outline.append(item)
+            previous_level = current_level
+            continue
 
-    for file in files:
-        file_path = os.path.join(output_dir, file)
+        if current_level == previous_level + 1:
+            cleaned_outline.append(item)
+            previous_level = current_level
+        elif current_level <= previous_level:
+            cleaned_outline.append(item)
+            previous_level = current_level
+        else:
+            continue  # Skip illegal jump
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    return cleaned_outline
 
-        if "outline" not in data:
-            continue
 
-        for item in data["outline"]:
-            if "index" in item:
-                del item["index"]
+def postprocess_outline(outline):
+    """
+    All outline clean-up passes in one go, in the order they used to be
+    applied to the files in output/ (illegal jumps, adjacent H1/H2
+    promotion, consecutive same-level headers, index removal).
+    """
+    if outline:
+        outline = drop_illegal_header_jumps(outline)
+        outline = promote_adjacent_headers(outline)
+        outline = drop_consecutive_same_level_headers(outline)
+    return strip_index_attributes(outline)
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
 
-
-def remove_consecutive_same_level_headers(output_dir):
+def _rewrite_outlines(output_dir, transform, skip_empty=True):
     files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
 
     for file in files:
         file_path = os.path.join(output_dir, file)
-
-        with open(file_path, "r", encoding="utf-8") as f:
+        with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
 
-        outline = data.get("outline", [])
-        if not outline:
+        if "outline" not in data or (skip_empty and not data["outline"]):
             continue
 
-        cleaned_outline = []
-        i = 0
-        while i < len(outline):
-            current = outline[i]
-            cleaned_outline.append(current)
-            j = i + 1
-
-            while j < len(outline) and outline[j]["level"] == current["level"]:
-                if outline[j]["index"] == outline[j - 1]["index"] + 1:
-                    j += 1
-                else:
-                    cleaned_outline.append(outline[j])
-                    j += 1
-            i = j
-
-        data["outline"] = cleaned_outline
+        data["outline"] = transform(data["outline"])
 
-        with open(file_path, "w", encoding="utf-8") as f:
+        with open(file_path, "w", encoding='utf-8') as f:
             json.dump(data, f, indent=2)
 
 
-def remove_illegal_header_jumps(output_dir):
-    files = [f for f in os.listdir(output_dir) if f.endswith(".json")]
+# Directory-wide variants, rewriting every output JSON in place.
 
-    for file in files:
-        file_path = os.path.join(output_dir, file)
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        outline = data.get("outline", [])
-        if not outline:
-            continue
+def merge_adjacent_headers(output_dir):
+    _rewrite_outlines(output_dir, promote_adjacent_headers)
 
-        cleaned_outline = []
-        previous_level = 0
 
-        for item in outline:
-            current_level = int(item["level"][1])
+def remove_index_attributes(output_dir):
+    _rewrite_outlines(output_dir, strip_index_attributes, skip_empty=False)
 
-            if previous_level == 0:
-                cleaned_outline.append(item)
-                previous_level = current_level
-                continue
 
-            if current_level == previous_level + 1:
-                cleaned_outline.append(item)
-                previous_level = current_level
-            elif current_level <= previous_level:
-                cleaned_outline.append(item)
-                previous_level = current_level
-            else:
-                continue  # Skip illegal jump
+def remove_consecutive_same_level_headers(output_dir):
+    _rewrite_outlines(output_dir, drop_consecutive_same_level_headers)
 
-        data["outline"] = cleaned_outline
 
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+def remove_illegal_header_jumps(output_dir):
+    _rewrite_outlines(output_dir, drop_illegal_header_jumps)
@@ -3,6 +3,15 @@
 import json
 import os
 
+def index_spans(data):
+    """
+    Adds a sequential index to each entry of an in-memory span list.
+    """
+    for i, entry in enumerate(data, start=1):
+        entry["index"] = i
+    return data
+
+
 def add_indexing(output_path):
     """
     Adds a sequential index to each entry in a JSON array.
@@ -12,8 +21,7 @@ def add_indexing(output_path):
     with open(output_path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    for i, entry in enumerate(data, start=1):
-        entry["index"] = i
+    index_spans(data)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2)
@@ -4,6 +4,9 @@ import json
 
 
 def are_styles_equal(style1, style2):
+    # Equal ids imply equal styles; different ids may still differ only in color.
+    if "style_id" in style1 and style1["style_id"] == style2.get("style_id"):
+        return True
     return (
         style1["font"] == style2["font"] and
         style1["size"] == style2["size"] and
@@ -43,22 +46,28 @@ def merge_spans(span1, span2):
     }
 
 
-def consolidate_lines(spans):
-    if not spans:
-        return []
+def iter_consolidated_lines(spans):
+    """Streaming form of consolidate_lines for an iterable of spans."""
+    current = None
 
-    consolidated = []
-    current = spans[0]
-
-    for next_span in spans[1:]:
-        if can_merge(current, next_span):
+    for next_span in spans:
+        if current is None:
+            current = next_span
+        elif can_merge(current, next_span):
             current = merge_spans(current, next_span)
         else:
-            consolidated.append(current)
+            yield current
             current = next_span
 
-    consolidated.append(current)
-    return consolidated
+    if current is not None:
+        yield current
+
+
+def consolidate_lines(spans):
+    if not spans:
+        return []
+
+    return list(iter_consolidated_lines(spans))
 
 
 def process_line_consolidation(json_path):
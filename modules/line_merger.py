@@ -3,6 +3,11 @@ import copy
 import json
 
 def same_style_attributes(style1, style2):
+    id1 = style1.get("style_id")
+    id2 = style2.get("style_id")
+    if id1 is not None and id2 is not None:
+        return id1 == id2
+
     keys = ["font", "size", "color", "font_flags"]
     for key in keys:
         val1 = style1.get(key) if key != "font_flags" else style1.get(key, {})
@@ -27,17 +32,24 @@ def deduplicate_styles(styles_list):
 
     unique_styles = []
     style_counts = []
+    # Registry-tagged styles are matched by id instead of pairwise comparison.
+    index_by_id = {} if all("style_id" in style for style in styles_list) else None
 
     for style in styles_list:
         found_index = -1
-        for i, existing_style in enumerate(unique_styles):
-            if same_style_attributes(style, existing_style):
-                found_index = i
-                break
+        if index_by_id is not None:
+            found_index = index_by_id.get(style["style_id"], -1)
+        else:
+            for i, existing_style in enumerate(unique_styles):
+                if same_style_attributes(style, existing_style):
+                    found_index = i
+                    break
 
         if found_index >= 0:
             style_counts[found_index] += 1
         else:
+            if index_by_id is not None:
+                index_by_id[style["style_id"]] = len(unique_styles)
             unique_styles.append(style.copy())
             style_counts.append(1)
 
@@ -172,6 +184,35 @@ def consolidate_merged_lines(merged_lines_group):
 
     return base_span
 
+def split_lines(page_spans, y_tolerance=3.0):
+    """
+    Lines of one page's y-sorted spans, each sorted by x. A line holds the
+    spans within y_tolerance of its first span.
+    """
+    lines = []
+    current_line = []
+    current_y = None
+
+    for span in page_spans:
+        span_y = span["position"]["y"]
+
+        if current_y is None or abs(span_y - current_y) <= y_tolerance:
+            current_line.append(span)
+            if current_y is None:
+                current_y = span_y
+        else:
+            if current_line:
+                current_line.sort(key=lambda s: s["position"]["x"])
+                lines.append(current_line)
+            current_line = [span]
+            current_y = span_y
+
+    if current_line:
+        current_line.sort(key=lambda s: s["position"]["x"])
+        lines.append(current_line)
+
+    return lines
+
 def group_spans_into_lines(data, y_tolerance=3.0):
     pages = defaultdict(list)
     for span in data:
@@ -181,70 +222,55 @@ def group_spans_into_lines(data, y_tolerance=3.0):
 
     for page_num, page_spans in pages.items():
         page_spans.sort(key=lambda s: s["position"]["y"])
-
-        lines = []
-        current_line = []
-        current_y = None
-
-        for span in page_spans:
-            span_y = span["position"]["y"]
-
-            if current_y is None or abs(span_y - current_y) <= y_tolerance:
-                current_line.append(span)
-                if current_y is None:
-                    current_y = span_y
-            else:
-                if current_line:
-                    current_line.sort(key=lambda s: s["position"]["x"])
-                    lines.append(current_line)
-                current_line = [span]
-                current_y = span_y
-
-        if current_line:
-            current_line.sort(key=lambda s: s["position"]["x"])
-            lines.append(current_line)
-
-        all_lines.extend(lines)
+        all_lines.extend(split_lines(page_spans, y_tolerance))
 
     return all_lines
 
+def iter_merged_lines(lines):
+    """
+    Streaming form of merge_lines_with_consolidation: consumes lines one at
+    a time and yields entries as soon as their merge group is closed.
+    """
+    merge_group = []
+
+    for line in lines:
+        if merge_group and should_merge_lines(merge_group[-1], line):
+            merge_group.append(line)
+            continue
+        if merge_group:
+            yield from flush_merge_group(merge_group)
+        merge_group = [line]
+
+    if merge_group:
+        yield from flush_merge_group(merge_group)
+
+def flush_merge_group(merge_group):
+    if len(merge_group) == 1:
+        for span in merge_group[0]:
+            span["lines"] = 1
+            if len(span["styles_used"]) > 1:
+                style_info = deduplicate_styles(span["styles_used"])
+                span["styles_used"] = style_info["unique_styles"]
+                if style_info["total_styles"] > len(style_info["unique_styles"]):
+                    span["style_optimization"] = {
+                        "optimized": True,
+                        "original_styles_count": style_info["total_styles"],
+                        "unique_styles_count": len(style_info["unique_styles"])
+                    }
+        return merge_group[0]
+
+    consolidated_entry = consolidate_merged_lines(merge_group)
+    return [consolidated_entry] if consolidated_entry else []
+
 def merge_lines_with_consolidation(lines):
     if not lines:
         return []
 
-    consolidated_entries = []
-    i = 0
-    n = len(lines)
-
-    while i < n:
-        merge_group = [lines[i]]
-        j = i + 1
-
-        while j < n and should_merge_lines(merge_group[-1], lines[j]):
-            merge_group.append(lines[j])
-            j += 1
-
-        if len(merge_group) == 1:
-            for span in merge_group[0]:
-                span["lines"] = 1
-                if len(span["styles_used"]) > 1:
-                    style_info = deduplicate_styles(span["styles_used"])
-                    span["styles_used"] = style_info["unique_styles"]
-                    if style_info["total_styles"] > len(style_info["unique_styles"]):
-                        span["style_optimization"] = {
-                            "optimized": True,
-                            "original_styles_count": style_info["total_styles"],
-                            "unique_styles_count": len(style_info["unique_styles"])
-                        }
-            consolidated_entries.extend(merge_group[0])
-        else:
-            consolidated_entry = consolidate_merged_lines(merge_group)
-            if consolidated_entry:
-                consolidated_entries.append(consolidated_entry)
-
-        i = j
+    return list(iter_merged_lines(lines))
 
-    return consolidated_entries
+def merge_lines(data):
+    lines = group_spans_into_lines(data)
+    return merge_lines_with_consolidation(lines)
 
 def process_line_merging(output_path):
     with open(output_path, "r", encoding="utf-8") as f:
@@ -253,8 +279,7 @@ def process_line_merging(output_path):
     if not data:
         return
 
-    lines = group_spans_into_lines(data)
-    consolidated_data = merge_lines_with_consolidation(lines)
+    consolidated_data = merge_lines(data)
 
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(consolidated_data, f, indent=2)
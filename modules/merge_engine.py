@@ -0,0 +1,119 @@
+# modules/merge_engine.py
+
+from collections import defaultdict
+
+from modules.yaxis_merger import merge_run
+from modules.line_merger import has_single_attribute, same_style_attributes, flush_merge_group
+from modules.line_consolidator import iter_consolidated_lines
+from modules.spatial import PageIndex
+
+
+def _x(span):
+    return span["position"]["x"]
+
+
+def _y(span):
+    return span["position"]["y"]
+
+
+def _page_rows(page_spans):
+    # The page's spans grouped by rounded y (yaxis_merger's lines), top
+    # down; only the distinct row keys are sorted, not the spans.
+    rows = defaultdict(list)
+    for span in page_spans:
+        rows[round(span["position"]["y"])].append(span)
+    return [rows[key] for key in sorted(rows)]
+
+
+def page_runs(page_spans):
+    """
+    The yaxis_merger runs of one page, ordered by y.
+    The page is walked row by row (spans with the same rounded y); each row
+    is sorted by x and its same-font runs are merged in place as the sweep
+    leaves them. Ties keep the input order, as the stable sorts of the
+    separate passes do.
+    """
+    runs = []
+    for row in _page_rows(page_spans):
+        row = sorted(row, key=_x)
+        row_runs = []
+        run = [row[0]]
+        for span in row[1:]:
+            if span["styles_used"][0]["font"] == run[-1]["styles_used"][0]["font"]:
+                run.append(span)
+            else:
+                row_runs.append(merge_run(run, in_place=True))
+                run = [span]
+        row_runs.append(merge_run(run, in_place=True))
+
+        # A run's y is its first span's, which need not be the smallest in
+        # its row; rows never overlap in y, so sorting within them suffices.
+        if len(row_runs) > 1:
+            row_runs.sort(key=_y)
+        runs.extend(row_runs)
+    return runs
+
+
+def page_lines(index, y_tolerance=3.0):
+    """
+    line_merger.split_lines over the runs of a PageIndex: each line is the
+    same_line range of its first run. Yields (first run's position, line).
+    """
+    start = 0
+    while start < len(index.spans):
+        start, stop = index.same_line(start, y_tolerance)
+        yield start, sorted(index.spans[start:stop], key=_x)
+        start = stop
+
+
+def _line_shape(line):
+    # What line_merger.should_merge_lines looks at besides the gap, computed once per line.
+    bottom = max(span["position"]["y"] + span["position"]["height"] for span in line)
+    return bottom, has_single_attribute(line), line[0]["styles_used"][0]
+
+
+def _styles_merge(above, below):
+    if above[1] and below[1]:
+        return same_style_attributes(above[2], below[2])
+    return not above[1] and not below[1]
+
+
+def iter_sweep_merged(pages, y_tolerance=3.0, max_gap=15.0):
+    """
+    Same-line merging, adjacent-line merging and consolidation in a single
+    sweep over an iterable of per-page span lists, in page order.
+    Equivalent to merge_on_yaxis_preserve_styles -> merge_lines ->
+    consolidate_lines; the input spans are updated in place.
+    """
+    def merged_lines():
+        group, shape = [], None
+        for page in pages:
+            if not page:
+                continue
+            index = PageIndex(page_runs(page))
+            for first, line in page_lines(index, y_tolerance):
+                line_shape = _line_shape(line)
+                # Adjacent when the line's first (topmost) run lies in the
+                # band directly below the previous line, on any page.
+                merge = False
+                if group:
+                    start, stop = index.below(shape[0], max_gap)
+                    merge = start <= first < stop and _styles_merge(shape, line_shape)
+                if merge:
+                    group.append(line)
+                else:
+                    if group:
+                        yield from flush_merge_group(group)
+                    group = [line]
+                shape = line_shape
+        if group:
+            yield from flush_merge_group(group)
+
+    return iter_consolidated_lines(merged_lines())
+
+
+def sweep_merge(spans, y_tolerance=3.0, max_gap=15.0):
+    pages = defaultdict(list)
+    for span in spans:
+        pages[span["page_number"]].append(span)
+    return list(iter_sweep_merged(pages.values(), y_tolerance, max_gap))
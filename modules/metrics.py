@@ -0,0 +1,215 @@
+# modules/metrics.py
+
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PERCENTILES = (50, 90, 99)
+PROMETHEUS_PREFIX = "pdf_outline"
+
+
+def _span_count(state):
+    spans = state.get("spans")
+    return len(spans) if spans is not None else 0
+
+
+class DocumentMetrics:
+    """
+    Timing, span-count and memory record of one document.
+    Each stage records wall and CPU time and the number of spans before and
+    after it; with trace_memory=True also the peak Python heap during the
+    stage (tracemalloc sees Python and NumPy allocations, not MuPDF's).
+    Failures are recorded with the exception type and message, and
+    `pages` holds the document's page / skipped-page counts.
+    """
+
+    def __init__(self, document, trace_memory=False):
+        self.document = document
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.cached = False
+        self.pages = {}
+        self.error = None
+        self._owns_tracemalloc = trace_memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self.wall_seconds = self.cpu_seconds = None
+
+    @contextmanager
+    def stage(self, name, state):
+        record = {"stage": name, "spans_in": _span_count(state)}
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record["wall_seconds"] = time.perf_counter() - wall
+            record["cpu_seconds"] = time.process_time() - cpu
+            record["spans_out"] = _span_count(state)
+            if self.trace_memory:
+                record["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            self.stages.append(record)
+
+    def finish(self, error=None):
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    def as_dict(self):
+        record = {
+            "document": self.document,
+            "status": "failed" if self.error else "ok",
+            "cached": self.cached,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "pages": self.pages.get("pages", 0),
+            "skipped_pages": self.pages.get("skipped_pages", 0),
+            "stages": self.stages,
+        }
+        if self.trace_memory:
+            record["peak_bytes"] = max((s["peak_bytes"] for s in self.stages), default=0)
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+def failed_document(document, error):
+    """Record of a document whose worker died before it could report."""
+    return {
+        "document": document, "status": "failed", "cached": False,
+        "wall_seconds": None, "cpu_seconds": None, "pages": 0, "skipped_pages": 0, "stages": [],
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _distribution(values):
+    values = sorted(values)
+    summary = {"count": len(values), "sum": sum(values), "max": values[-1] if values else None}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(values, pct)
+    return summary
+
+
+def build_report(documents):
+    """Batch report of DocumentMetrics.as_dict() records: totals, percentiles, per-stage figures."""
+    stages = {}
+    for document in documents:
+        for record in document["stages"]:
+            stage = stages.setdefault(record["stage"], {
+                "runs": 0, "errors": 0, "wall": [], "cpu_seconds": 0.0,
+                "spans_in": 0, "spans_out": 0, "peak_bytes": None,
+            })
+            stage["runs"] += 1
+            stage["errors"] += "error" in record
+            stage["wall"].append(record["wall_seconds"])
+            stage["cpu_seconds"] += record["cpu_seconds"]
+            stage["spans_in"] += record["spans_in"]
+            stage["spans_out"] += record["spans_out"]
+            if "peak_bytes" in record:
+                stage["peak_bytes"] = max(stage["peak_bytes"] or 0, record["peak_bytes"])
+
+    for stage in stages.values():
+        stage["wall_seconds"] = _distribution(stage.pop("wall"))
+
+    finished = [d for d in documents if d["wall_seconds"] is not None]
+    return {
+        "documents": len(documents),
+        "succeeded": sum(1 for d in documents if d["status"] == "ok"),
+        "failed": sum(1 for d in documents if d["status"] == "failed"),
+        "cached": sum(1 for d in documents if d["cached"]),
+        "wall_seconds": _distribution([d["wall_seconds"] for d in finished]),
+        "cpu_seconds": sum(d["cpu_seconds"] for d in finished),
+        "pages": sum(d["pages"] for d in documents),
+        "skipped_pages": sum(d["skipped_pages"] for d in documents),
+        "stages": stages,
+        "errors": {d["document"]: d["error"] for d in documents if "error" in d},
+        "per_document": documents,
+    }
+
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_json_report(report, path):
+    _atomic_write(path, json.dumps(report, indent=2))
+
+
+def _metric(lines, name, kind, help_text, samples):
+    name = f"{PROMETHEUS_PREFIX}_{name}"
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix, labels, value in samples:
+        if value is None:
+            continue
+        label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+        lines.append(f"{name}{suffix}{{{label_text}}} {value}" if label_text else f"{name}{suffix} {value}")
+
+
+def _summary_samples(distribution, labels=None):
+    labels = labels or {}
+    samples = [("", dict(labels, quantile=str(pct / 100)), distribution[f"p{pct}"]) for pct in PERCENTILES]
+    samples.append(("_sum", labels, distribution["sum"]))
+    samples.append(("_count", labels, distribution["count"]))
+    return samples
+
+
+def write_prometheus_textfile(report, path):
+    """Write the report in the node_exporter textfile-collector format (atomically)."""
+    lines = []
+    _metric(lines, "documents_total", "counter", "Documents processed by status.", [
+        ("", {"status": "ok"}, report["succeeded"]),
+        ("", {"status": "failed"}, report["failed"]),
+    ])
+    _metric(lines, "cache_hits_total", "counter", "Documents answered from the result cache.",
+            [("", {}, report["cached"])])
+    _metric(lines, "document_seconds", "summary", "Wall time per document.",
+            _summary_samples(report["wall_seconds"]))
+    _metric(lines, "cpu_seconds_total", "counter", "CPU time spent on documents.",
+            [("", {}, report["cpu_seconds"])])
+    _metric(lines, "pages_total", "counter", "Pages of the processed documents.",
+            [("", {}, report["pages"])])
+    _metric(lines, "skipped_pages_total", "counter", "Pages without a text layer skipped by the triage.",
+            [("", {}, report["skipped_pages"])])
+
+    stages = report["stages"].items()
+    _metric(lines, "stage_seconds", "summary", "Wall time per stage run.", [
+        sample for name, stage in stages for sample in _summary_samples(stage["wall_seconds"], {"stage": name})
+    ])
+    _metric(lines, "stage_cpu_seconds_total", "counter", "CPU time per stage.",
+            [("", {"stage": name}, stage["cpu_seconds"]) for name, stage in stages])
+    _metric(lines, "stage_errors_total", "counter", "Stage runs that raised.",
+            [("", {"stage": name}, stage["errors"]) for name, stage in stages])
+    _metric(lines, "stage_spans_in_total", "counter", "Spans entering each stage.",
+            [("", {"stage": name}, stage["spans_in"]) for name, stage in stages])
+    _metric(lines, "stage_spans_out_total", "counter", "Spans leaving each stage.",
+            [("", {"stage": name}, stage["spans_out"]) for name, stage in stages])
+    _metric(lines, "stage_peak_bytes", "gauge", "Largest traced Python heap during a stage.",
+            [("", {"stage": name}, stage["peak_bytes"]) for name, stage in stages])
+    _atomic_write(path, "\n".join(lines) + "\n")
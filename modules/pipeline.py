@@ -1,62 +1,261 @@
 import os
 import json
-import shutil
-
-from modules.scraper import extract_pdf_content
-from modules.filter import is_garbage
-from modules.cleaner import clean_and_merge
-from modules.yaxis_merger import process_yaxis_merge
-from modules.line_merger import process_line_merging
-from modules.title_extractor import process_title_extraction
-from modules.headers import process_header_extraction
-from modules.line_consolidator import process_line_consolidation
-from modules.indexer import add_indexing
-from modules.h1_refiner import refine_h1_headers_regionally
-from modules.hierarchy import process_header_hierarchy
-from modules.hierarchy_merger import (
-    merge_adjacent_headers,
-    remove_index_attributes,
-    remove_consecutive_same_level_headers,
-    remove_illegal_header_jumps,
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+
+from modules.cache import source_digest
+from modules.metrics import DocumentMetrics, build_report, failed_document, write_json_report, write_prometheus_textfile
+from modules.scraper import extract_span_table, iter_page_tables
+from modules.span_table import SpanTable
+from modules.styles import StyleRegistry
+from modules.filter import filter_garbage, is_garbage
+from modules.cleaner import (
+    duplicate_keys,
+    merge_duplicates_same_page,
+    merge_table_duplicates_same_page,
+    merge_table_page_rows,
+    table_entry_key,
 )
+from modules.merge_engine import iter_sweep_merged, sweep_merge
+from modules.title_extractor import mark_title
+from modules.headers import extract_h1_headers
+from modules.indexer import index_spans
+from modules.h1_refiner import refine_h1_headers
+from modules.hierarchy import build_header_hierarchy
+from modules.hierarchy_merger import postprocess_outline
+from modules.toc import toc_output
+from modules.tracing import Tracer, trace_span, write_trace
+from modules.profiling import SUMMARY_FILE, profile_document, write_profile_summary
 
 
-def delete_and_recreate_folder(folder_path):
-    if os.path.exists(folder_path):
-        shutil.rmtree(folder_path)
-    os.makedirs(folder_path, exist_ok=True)
+# Default folders of the command-line pipeline.
+INPUT_DIR = "input"
+OUTPUT_DIR = "output"
+DUMP_DIR = "Temp"
 
 
 def clean_and_merge(data):
-    from modules.cleaner import merge_duplicates_same_page, remove_cross_page_duplicates
-    step1 = merge_duplicates_same_page(data)
+    from modules.cleaner import remove_cross_page_duplicates
+    if isinstance(data, SpanTable):
+        step1 = merge_table_duplicates_same_page(data)
+    else:
+        step1 = merge_duplicates_same_page(data)
     step2 = remove_cross_page_duplicates(step1)
     return step2
 
 
-def generate_final_output(temp_dir, final_dir, filename):
-    base_name = os.path.splitext(filename)[0]
-    temp_path = os.path.join(temp_dir, f"{base_name}.json")
-    hierarchy_path = os.path.join(temp_dir, f"hierarchy_{base_name}.json")
-    final_output_path = os.path.join(final_dir, f"{base_name}.json")
+# Each stage takes the per-document state and updates it in memory:
+# "source" (pdf path) -> "spans" -> "h1_headers" -> "hierarchy".
+# "page_jobs" optionally enables page-parallel extraction.
+# Extraction yields a SpanTable; the clean stage turns it into span dicts.
+# "styles" is the document's StyleRegistry, filled during extraction.
+# "page_stats" counts the pages and the pages skipped by the text triage.
+def stage_extract(state):
+    state["styles"] = StyleRegistry()
+    state["page_stats"] = {}
+    state["spans"] = extract_span_table(
+        state["source"], workers=state.get("page_jobs", 1), registry=state["styles"], stats=state["page_stats"]
+    )
+
+
+def stage_clean(state):
+    state["spans"] = clean_and_merge(state["spans"])
+
+
+# Same-line merging, adjacent-line merging and consolidation in one sweep
+# (the former yaxis_merge, line_merge and line_consolidate stages).
+def stage_merge(state):
+    state["spans"] = sweep_merge(state["spans"])
+
+
+def stage_filter(state):
+    state["spans"] = filter_garbage(state["spans"])
+
+
+def stage_index(state):
+    state["spans"] = index_spans(state["spans"])
 
-    with open(temp_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
 
+def stage_title(state):
+    state["spans"] = mark_title(state["spans"])
+
+
+def stage_headers(state):
+    h1_headers = extract_h1_headers(state["spans"])
+    if h1_headers is None:
+        raise ValueError("no H1 header candidates found")
+    state["h1_headers"] = h1_headers
+
+
+def stage_h1_refine(state):
+    state["h1_headers"] = refine_h1_headers(state["spans"], state["h1_headers"])
+
+
+def stage_hierarchy(state):
+    state["hierarchy"] = build_header_hierarchy(
+        state["spans"], state["h1_headers"], registry=state.get("styles")
+    )
+
+
+def stream_spans(pdf_path, registry=None, stats=None):
+    """
+    Streaming equivalent of the extract -> filter stages.
+    Pages are extracted and de-duplicated one at a time and kept as compact
+    per-page SpanTables plus (row, merged text) pairs. The cross-page
+    duplicate check is the only document-wide step; it counts the entries'
+    keys, after which every page's span dicts are built and merged, grouped
+    and consolidated incrementally.
+    """
+    pages = [(table, merge_table_page_rows(table)) for table in iter_page_tables(pdf_path, registry, stats)]
+    repeated = duplicate_keys(
+        table_entry_key(table, row, text) for table, entries in pages for row, text in entries
+    )
+
+    def kept_pages():
+        pages.reverse()
+        while pages:
+            table, entries = pages.pop()
+            page = []
+            for row, text in entries:
+                if table_entry_key(table, row, text) not in repeated:
+                    span = table.span(row)
+                    span["text"] = text
+                    page.append(span)
+            yield page
+
+    spans = iter_sweep_merged(kept_pages())
+    return [span for span in spans if not is_garbage(span["text"])]
+
+
+def stage_stream(state):
+    state["styles"] = StyleRegistry()
+    state["page_stats"] = {}
+    state["spans"] = stream_spans(state["source"], state["styles"], state["page_stats"])
+
+
+def stage_toc(state):
+    # Optional fast path; "final_output" stays None when the TOC is unusable.
+    state["final_output"] = toc_output(state["source"])
+
+
+STAGES = [
+    ("extract", stage_extract),
+    ("clean", stage_clean),
+    ("merge", stage_merge),
+    ("filter", stage_filter),
+    ("index", stage_index),
+    ("title", stage_title),
+    ("headers", stage_headers),
+    ("h1_refine", stage_h1_refine),
+    ("hierarchy", stage_hierarchy),
+]
+
+
+# stage_stream replaces every stage before "index".
+STREAMING_STAGES = [("stream", stage_stream)] + STAGES[[name for name, _ in STAGES].index("index"):]
+
+
+# Bump a stage's version whenever its output changes; checkpoints taken
+# after it (and after every later stage) are then ignored.
+STAGE_VERSIONS = {
+    "extract": 1,
+    "clean": 1,
+    "merge": 1,
+    "filter": 1,
+    "stream": 1,
+    "index": 1,
+    "title": 1,
+    "headers": 1,
+    "h1_refine": 1,
+    "hierarchy": 1,
+}
+
+# Inputs of a run rather than stage outputs; never checkpointed.
+TRANSIENT_STATE_KEYS = ("source", "page_jobs")
+
+
+def run_stage(state, name, stage, metrics=None):
+    with trace_span(name, "stage"):
+        if metrics is None:
+            stage(state)
+        else:
+            with metrics.stage(name, state):
+                stage(state)
+
+
+def run_stages(state, stages=STAGES, metrics=None):
+    for name, stage in stages:
+        run_stage(state, name, stage, metrics)
+    return state
+
+
+def stage_bounds(stages, from_stage=None, to_stage=None):
+    """(start, stop) positions of from_stage / to_stage within stages."""
+    names = [name for name, _ in stages]
+    for name in (from_stage, to_stage):
+        if name is not None and name not in names:
+            raise ValueError(f"unknown stage {name!r}, expected one of: {', '.join(names)}")
+    start = names.index(from_stage) if from_stage else 0
+    stop = names.index(to_stage) + 1 if to_stage else len(names)
+    if start >= stop:
+        raise ValueError(f"stage {from_stage!r} comes after {to_stage!r}")
+    return start, stop
+
+
+def run_checkpointed_stages(state, store, stages=STAGES, from_stage=None, to_stage=None, metrics=None):
+    """
+    Run stages from from_stage through to_stage, checkpointing after each.
+    The state is restored from the latest checkpoint before from_stage;
+    when none exists the missing upstream stages are run (and saved) first.
+    """
+    start, stop = stage_bounds(stages, from_stage, to_stage)
+    keys = store.stage_keys(source_digest(state["source"]), stages, STAGE_VERSIONS)
+
+    resume = 0
+    for pos in range(start, 0, -1):
+        saved = store.load(keys[pos - 1])
+        if saved is not None:
+            state.update(saved)
+            resume = pos
+            break
+
+    for pos in range(resume, stop):
+        run_stage(state, *stages[pos], metrics)
+        store.save(keys[pos], {k: v for k, v in state.items() if k not in TRANSIENT_STATE_KEYS})
+    return state
+
+
+def dump_state(state, dump_dir, pdf_name):
+    """Write the intermediate span / header / hierarchy lists for debugging."""
+    os.makedirs(dump_dir, exist_ok=True)
+    if "spans" in state:
+        spans = state["spans"]
+        if isinstance(spans, SpanTable):
+            spans = spans.to_spans()
+        with open(os.path.join(dump_dir, f"{pdf_name}.json"), "w", encoding="utf-8") as f:
+            json.dump(spans, f, indent=2)
+    if "h1_headers" in state:
+        with open(os.path.join(dump_dir, f"h1_{pdf_name}.json"), "w", encoding="utf-8") as f:
+            json.dump(state["h1_headers"], f, indent=2)
+    if "hierarchy" in state:
+        with open(os.path.join(dump_dir, f"hierarchy_{pdf_name}.json"), "w", encoding="utf-8") as f:
+            json.dump(state["hierarchy"], f, indent=2, ensure_ascii=False)
+
+
+def build_final_output(data, hierarchy_data):
     title = ""
     if data and data[0].get("is_title"):
         title = data[0]["text"]
 
-    if os.path.exists(hierarchy_path):
-        with open(hierarchy_path, 'r', encoding='utf-8') as f:
-            hierarchy_data = json.load(f)
-    else:
-        hierarchy_data = []
+    # First span per index wins, as with the previous linear lookup.
+    page_by_index = {}
+    for span in data:
+        page_by_index.setdefault(span.get("index"), span.get("page_number", 1))
 
     def flatten_hierarchy(items, result):
         for item in items:
             level = f"H{item['level']}"
-            page = next((span.get("page_number", 1) for span in data if span.get("index") == item["index"]), 1)
+            page = page_by_index.get(item["index"], 1)
             result.append({
                 "level": level,
                 "text": item["text"],
@@ -69,52 +268,134 @@ def generate_final_output(temp_dir, final_dir, filename):
     outline = []
     flatten_hierarchy(hierarchy_data, outline)
 
-    final_output = {
+    return {
         "title": title,
         "outline": outline
     }
 
+
+def write_final_output(final_output, final_dir, filename):
+    base_name = os.path.splitext(filename)[0]
+    final_output_path = os.path.join(final_dir, f"{base_name}.json")
+
     os.makedirs(final_dir, exist_ok=True)
     with open(final_output_path, "w", encoding="utf-8") as f:
         json.dump(final_output, f, indent=2)
 
 
-def process_single_pdf(pdf_filename, input_dir, output_dir):
-    pdf_name = os.path.splitext(pdf_filename)[0]
-    input_path = os.path.join(input_dir, pdf_filename)
-    output_path = os.path.join(output_dir, f"{pdf_name}.json")
-
-    extracted = extract_pdf_content(input_path)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(extracted, f, indent=2)
+def generate_final_output(temp_dir, final_dir, filename):
+    base_name = os.path.splitext(filename)[0]
+    temp_path = os.path.join(temp_dir, f"{base_name}.json")
+    hierarchy_path = os.path.join(temp_dir, f"hierarchy_{base_name}.json")
 
-    with open(output_path, "r", encoding="utf-8") as f:
+    with open(temp_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    cleaned_data = clean_and_merge(data)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(cleaned_data, f, indent=2)
-
-    process_yaxis_merge(output_path)
-    process_line_merging(output_path)
-    process_line_consolidation(output_path)
-
-    with open(output_path, "r", encoding="utf-8") as f:
-        extracted_data = json.load(f)
-    filtered_data = [span for span in extracted_data if not is_garbage(span["text"])]
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(filtered_data, f, indent=2)
 
-    add_indexing(output_path)
-    process_title_extraction(output_path, output_dir)
-    process_header_extraction(output_path, output_dir)
+    if os.path.exists(hierarchy_path):
+        with open(hierarchy_path, 'r', encoding='utf-8') as f:
+            hierarchy_data = json.load(f)
+    else:
+        hierarchy_data = []
 
-    h1_json_path = os.path.join(output_dir, f"h1_{pdf_name}.json")
-    refine_h1_headers_regionally(output_path, h1_json_path)
+    write_final_output(build_final_output(data, hierarchy_data), final_dir, filename)
+
+
+def finalize_output(state):
+    """The final {"title", "outline"} object of a fully staged document."""
+    final_output = build_final_output(state["spans"], state["hierarchy"])
+    final_output["outline"] = decrement_outline_pages(postprocess_outline(final_output["outline"]))
+    return final_output
+
+
+def process_pdf(source, page_jobs=1, stream=False, cache=None, checkpoints=None,
+                from_stage=None, to_stage=None, state=None, metrics=None, use_toc=False):
+    """
+    Run the pipeline on one PDF and return its final {"title", "outline"} object.
+    source is a file path or the document itself as bytes, a bytearray, a
+    memoryview or an mmap. Every call works on its own state and nothing is
+    written to disk unless a ResultCache or CheckpointStore is passed.
+    stream=True uses the page-at-a-time extraction (page_jobs is ignored).
+    With a CheckpointStore every stage's output is checkpointed and the run
+    can resume at from_stage; if to_stage stops before the last stage the
+    result is None. Pass a dict as state to keep the intermediate results
+    and a DocumentMetrics to record per-stage timings.
+    use_toc=True first tries the PDF's embedded bookmarks (modules.toc) and
+    skips every other stage when they pass the quality checks.
+    """
+    stages = STREAMING_STAGES if stream else STAGES
+    _, stop = stage_bounds(stages, from_stage, to_stage)
+    partial = stop < len(stages)
+
+    cache_key = None
+    if cache is not None and not partial:
+        cache_key = cache.key(source, {"use_toc": use_toc})
+        final_output = cache.get(cache_key)
+        if final_output is not None:
+            if metrics is not None:
+                metrics.cached = True
+            return final_output
+
+    state = {} if state is None else state
+    state.update(source=source, page_jobs=page_jobs)
+    if use_toc and not partial:
+        run_stage(state, "toc", stage_toc, metrics)
+        final_output = state.pop("final_output")
+    else:
+        final_output = None
+
+    if final_output is None:
+        if checkpoints is not None:
+            run_checkpointed_stages(state, checkpoints, stages, from_stage, to_stage, metrics)
+        else:
+            run_stages(state, stages[:stop], metrics)
+        if metrics is not None:
+            metrics.pages.update(state.get("page_stats", {}))
+        if partial:
+            return None
+        final_output = finalize_output(state)
+
+    if cache_key is not None:
+        cache.put(cache_key, final_output)
+    return final_output
+
+
+def _warm_worker():
+    # Pay the PyMuPDF / pipeline import and MuPDF context setup once per
+    # pool worker instead of on the first document it receives.
+    import fitz
+    fitz.open().close()
+
+
+def process_single_pdf(pdf_filename, input_dir, output_dir, dump_dir=None, page_jobs=1, stream=False,
+                       cache=None, checkpoints=None, from_stage=None, to_stage=None, metrics=None,
+                       use_toc=False):
+    """
+    process_pdf on input_dir/pdf_filename, writing the outline to output_dir.
+    With a dump_dir the intermediate lists are also written there (the
+    cache is then bypassed). A run stopped early by to_stage writes nothing.
+    """
+    pdf_name = os.path.splitext(pdf_filename)[0]
+    state = {} if dump_dir is not None else None
+    try:
+        final_output = process_pdf(
+            os.path.join(input_dir, pdf_filename), page_jobs=page_jobs, stream=stream,
+            cache=None if dump_dir is not None else cache, checkpoints=checkpoints,
+            from_stage=from_stage, to_stage=to_stage, state=state, metrics=metrics, use_toc=use_toc,
+        )
+    finally:
+        if state is not None:
+            dump_state(state, dump_dir, pdf_name)
+
+    if final_output is not None:
+        write_final_output(final_output, output_dir, pdf_filename)
+    return True
 
-    process_header_hierarchy(output_path, output_dir)
-    generate_final_output(output_dir, "output", pdf_filename)
 
-    return True
+def decrement_outline_pages(outline):
+    for item in outline:
+        if "page" in item and isinstance(item["page"], int):
+            item["page"] = max(0, item["page"] - 1)
+    return outline
 
 
 def decrement_page_numbers(output_dir):
@@ -129,48 +410,118 @@ def decrement_page_numbers(output_dir):
         if "outline" not in data:
             continue
 
-        for item in data["outline"]:
-            if "page" in item and isinstance(item["page"], int):
-                item["page"] = max(0, item["page"] - 1)
+        decrement_outline_pages(data["outline"])
 
         with open(file_path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
 
 
-def run_pipeline():
-    input_dir = "input"
-    output_dir = "Temp"
-    final_dir = "output"
-
-    delete_and_recreate_folder(output_dir)  # 🔥 Clean start for Temp folder
-    os.makedirs(final_dir, exist_ok=True)
+def _process_pdf_task(pdf_filename, input_dir, output_dir, options, instruments=None):
+    # Top-level so it can be shipped to pool workers; failures become False.
+    # instruments: "metrics", "trace_memory", "trace" (bools), "profile_dir"
+    # and "profile_threshold". Returns (success, {"metrics": DocumentMetrics
+    # record, "trace": events, "profile": profile record}) with None for
+    # whatever was not enabled.
+    instruments = instruments or {}
+    metrics = DocumentMetrics(pdf_filename, instruments.get("trace_memory")) if instruments.get("metrics") else None
+    tracer = Tracer() if instruments.get("trace") else None
+    profile_dir = instruments.get("profile_dir")
+    extras = {"metrics": None, "trace": None, "profile": None}
+
+    with ExitStack() as stack:
+        if tracer is not None:
+            stack.enter_context(tracer.activate())
+            stack.enter_context(trace_span(pdf_filename, "document"))
+        if profile_dir:
+            profile_path = os.path.join(profile_dir, f"{os.path.splitext(pdf_filename)[0]}.prof")
+            extras["profile"] = stack.enter_context(
+                profile_document(profile_path, instruments.get("profile_threshold", 0.0))
+            )
+        error = None
+        try:
+            success = process_single_pdf(pdf_filename, input_dir, output_dir, metrics=metrics, **options)
+        except Exception as e:
+            success, error = False, e
+
+    if metrics is not None:
+        metrics.finish(error)
+        extras["metrics"] = metrics.as_dict()
+    if tracer is not None:
+        extras["trace"] = tracer.events
+    return success, extras
+
+
+def run_pipeline(dump=False, jobs=None, page_jobs=1, stream=False, cache=None,
+                 checkpoints=None, from_stage=None, to_stage=None, use_toc=False,
+                 input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, dump_dir=DUMP_DIR,
+                 metrics_report=None, prometheus_textfile=None, trace_memory=False, trace_file=None,
+                 profile_dir=None, profile_threshold=0.0, profile_top=30):
+    """
+    Process every PDF in input_dir, writing one outline per document to
+    output_dir; returns the (succeeded, failed) counts. The other keyword
+    arguments correspond to main.py's command-line options, which the
+    readme describes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
 
     pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")]
     if not pdf_files:
-        return
+        return 0, 0
 
-    successful_count = 0
-    failed_count = 0
+    stage_bounds(STREAMING_STAGES if stream else STAGES, from_stage, to_stage)  # fail fast on bad names
+    options = {
+        "dump_dir": dump_dir if dump else None, "page_jobs": page_jobs, "stream": stream, "cache": cache,
+        "checkpoints": checkpoints, "from_stage": from_stage, "to_stage": to_stage, "use_toc": use_toc,
+    }
 
-    for pdf_filename in pdf_files:
-        try:
-            success = process_single_pdf(pdf_filename, input_dir, output_dir)
-            if success:
-                successful_count += 1
-            else:
-                failed_count += 1
-        except Exception:
-            failed_count += 1
-
-    remove_illegal_header_jumps(final_dir)
-    merge_adjacent_headers(final_dir)
-    remove_consecutive_same_level_headers(final_dir)
-    remove_index_attributes(final_dir)
-    decrement_page_numbers(final_dir)
-
-    # 🧹 Clean up Temp folder after processing
-    if os.path.exists(output_dir):
-        shutil.rmtree(output_dir)
+    collect_metrics = bool(metrics_report or prometheus_textfile)
+    instruments = {
+        "metrics": collect_metrics, "trace_memory": trace_memory, "trace": bool(trace_file),
+        "profile_dir": profile_dir, "profile_threshold": profile_threshold,
+    }
+    task_args = (input_dir, output_dir, options, instruments)
+
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    jobs = max(1, min(jobs, len(pdf_files)))
+
+    if jobs == 1:
+        results = [_process_pdf_task(f, *task_args) for f in pdf_files]
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(_process_pdf_task, f, *task_args) for f in pdf_files]
+            for pdf_filename, future in zip(pdf_files, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:  # e.g. a worker died
+                    record = failed_document(pdf_filename, e) if collect_metrics else None
+                    results.append((False, {"metrics": record, "trace": None, "profile": None}))
+        # Each worker only accounted for its own entries.
+        if cache is not None:
+            cache.evict()
+        if checkpoints is not None:
+            checkpoints.evict()
+
+    if collect_metrics:
+        report = build_report([extras["metrics"] for _, extras in results])
+        if metrics_report:
+            write_json_report(report, metrics_report)
+        if prometheus_textfile:
+            write_prometheus_textfile(report, prometheus_textfile)
+
+    if trace_file:
+        write_trace([event for _, extras in results for event in extras["trace"] or ()], trace_file)
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+        write_profile_summary(
+            [extras["profile"] for _, extras in results], os.path.join(profile_dir, SUMMARY_FILE), profile_top
+        )
+
+    successful_count = sum(1 for success, _ in results if success)
+    failed_count = len(results) - successful_count
+
+    return successful_count, failed_count
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+# modules/profiling.py
+
+import cProfile
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+SUMMARY_FILE = "summary.txt"
+
+
+@contextmanager
+def profile_document(profile_path, threshold=0.0):
+    """
+    cProfile the body of the with-block and dump it to profile_path when it
+    took at least threshold seconds. Yields a dict whose "path" is set to the
+    written file (None when the run was fast) and "seconds" to the run time,
+    also when the block raises.
+    """
+    record = {"path": None, "seconds": None}
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield record
+    finally:
+        profiler.disable()
+        record["seconds"] = time.perf_counter() - start
+        if record["seconds"] >= threshold:
+            os.makedirs(os.path.dirname(profile_path) or ".", exist_ok=True)
+            profiler.dump_stats(profile_path)
+            record["path"] = profile_path
+
+
+def write_profile_summary(records, summary_path, top=30):
+    """Top-N functions by cumulative and by own time over every written profile."""
+    records = [r for r in records if r and r["path"]]
+    with open(summary_path, "w", encoding="utf-8") as f:
+        f.write(f"{len(records)} profiled document(s)\n")
+        for record in sorted(records, key=lambda r: -r["seconds"]):
+            f.write(f"  {record['seconds']:8.3f}s  {os.path.basename(record['path'])}\n")
+        if not records:
+            return
+        stats = pstats.Stats(*(r["path"] for r in records), stream=f)
+        stats.strip_dirs()
+        for order in ("cumulative", "tottime"):
+            f.write(f"\n=== top {top} by {order} ===\n")
+            stats.sort_stats(order).print_stats(top)
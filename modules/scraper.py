@@ -1,48 +1,185 @@
 import fitz  # PyMuPDF
 import math
+import os
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
+from modules.span_table import SpanTable, SpanTableBuilder
+from modules.styles import StyleRegistry
+from modules.tracing import Tracer, active_tracer, trace_span
 
-def extract_pdf_content(pdf_path):
-    doc = fitz.open(pdf_path)
-    all_spans = []
-
-    for page_num, page in enumerate(doc, start=1):
-        spans = page.get_text("dict")["blocks"]
-        for block in spans:
-            if block["type"] != 0:
-                continue
-            for line in block["lines"]:
-                for span in line["spans"]:
-                    bbox = span["bbox"]
-                    rounded_font_size = math.ceil(span["size"])
-                    rounded_bbox = [math.ceil(coord) for coord in bbox]
-
-                    x, y = rounded_bbox[0], rounded_bbox[1]
-                    width = rounded_bbox[2] - rounded_bbox[0]
-                    height = rounded_bbox[3] - rounded_bbox[1]
-
-                    span_data = {
-                        "text": span["text"].strip(),
-                        "styles_used": [{
-                            "font": span["font"],
-                            "size": rounded_font_size,
-                            "color": span["color"],
-                            "font_flags": {
-                                "bold": bool(span["flags"] & 2),
-                                "italic": bool(span["flags"] & 1),
-                                "serif": bool(span["flags"] & 4),
-                            }
-                        }],
-                        "position": {
-                            "x": x,
-                            "y": y,
-                            "width": width,
-                            "height": height
-                        },
-                        "bbox": rounded_bbox,
-                        "page_number": page_num
-                    }
-                    all_spans.append(span_data)
-
-    doc.close()  # Added to close the document properly
-    return all_spans
+# Documents shorter than this are always extracted in-process; spawning
+# workers costs more than it saves on small files.
+PARALLEL_MIN_PAGES = 64
+# Page ranges handed out per worker, so uneven pages still balance.
+CHUNKS_PER_WORKER = 4
+# PyMuPDF's default flags for "dict" output minus TEXT_PRESERVE_IMAGES: image
+# blocks (and their decoded payloads) would only be thrown away.
+TEXT_ONLY_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def is_pdf_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+def open_pdf(pdf_path):
+    """Open a PDF given as a file path or in memory (bytes, bytearray, memoryview or mmap)."""
+    if is_pdf_path(pdf_path):
+        return fitz.open(pdf_path)
+    return fitz.open(stream=memoryview(pdf_path), filetype="pdf")
+
+
+def _text_spans(page):
+    """Yield the raw PyMuPDF spans of the text blocks of a page."""
+    with trace_span("get_text", "extract", page=page.number + 1):
+        spans = page.get_text("dict", flags=TEXT_ONLY_FLAGS)["blocks"]
+    for block in spans:
+        if block["type"] != 0:
+            continue
+        for line in block["lines"]:
+            yield from line["spans"]
+
+
+def add_page_rows(builder, page, page_num):
+    """Append the spans of a page to a SpanTableBuilder, without building dicts."""
+    with trace_span("page", "extract", page=page_num):
+        for span in _text_spans(page):
+            x0, y0, x1, y1 = [math.ceil(coord) for coord in span["bbox"]]
+            builder.add(
+                page_num, x0, y0, x1 - x0, y1 - y0,
+                math.ceil(span["size"]), span["flags"], span["font"], span["color"],
+                span["text"].strip(),
+            )
+
+
+def page_has_text(page):
+    """
+    Cheap text-layer probe for skipping the get_text pass on blank, scanned
+    or figure-only pages. A page is kept when its resources (form XObjects
+    included) list a font, when it has an annotation or a widget (their
+    appearance streams carry their own fonts, which get_fonts does not
+    list), or when its content stream has a text object (BT) at all, since
+    MuPDF substitutes a default font for one missing from the resources.
+    """
+    if page.get_fonts() or page.first_annot is not None or page.first_widget is not None:
+        return True
+    return b"BT" in page.read_contents()
+
+
+def _text_pages(doc, start, stop, skipped):
+    # Yield (page_num, page) of the pages in [start, stop) with a text layer;
+    # skipped[0] counts the others.
+    for page_index in range(start, stop):
+        page = doc[page_index]
+        if page_has_text(page):
+            yield page_index + 1, page
+        else:
+            skipped[0] += 1
+
+
+def _record_pages(stats, page_count, skipped):
+    if stats is not None:
+        stats["pages"] = stats.get("pages", 0) + page_count
+        stats["skipped_pages"] = stats.get("skipped_pages", 0) + skipped
+
+
+def extract_page_range_table(pdf_path, start, stop, trace=False):
+    """
+    SpanTable of pages [start, stop) (0-based) with a private document
+    handle, plus the skipped page count and, with trace, the trace events
+    recorded by a worker-local Tracer (None otherwise). Style ids are local
+    to the range; SpanTable.concat re-interns them.
+    """
+    tracer = Tracer() if trace else None
+    with tracer.activate() if tracer is not None else nullcontext():
+        with trace_span("page_range", "extract", start=start + 1, stop=stop):
+            doc = open_pdf(pdf_path)
+            builder, skipped = SpanTableBuilder(), [0]
+            for page_num, page in _text_pages(doc, start, stop, skipped):
+                add_page_rows(builder, page, page_num)
+            doc.close()
+    return builder.build(), skipped[0], tracer.events if tracer is not None else None
+
+
+def iter_page_tables(pdf_path, registry=None, stats=None):
+    """
+    Yield one SpanTable per page with a text layer, in order and one page
+    at a time; the tables share one registry.
+    """
+    registry = registry if registry is not None else StyleRegistry()
+    doc = open_pdf(pdf_path)
+    skipped = [0]
+    try:
+        for page_num, page in _text_pages(doc, 0, doc.page_count, skipped):
+            builder = SpanTableBuilder(registry)
+            add_page_rows(builder, page, page_num)
+            yield builder.build()
+        _record_pages(stats, doc.page_count, skipped[0])
+    finally:
+        doc.close()
+
+
+def _page_ranges(page_count, chunk_count):
+    chunk_count = max(1, min(chunk_count, page_count))
+    bounds = [page_count * i // chunk_count for i in range(chunk_count + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _extract_parallel(range_extractor, pdf_path, page_count, workers):
+    # The workers trace into their own Tracer when one is active here; their
+    # events are merged into it, and the results returned without them.
+    ranges = _page_ranges(page_count, workers * CHUNKS_PER_WORKER)
+    if not is_pdf_path(pdf_path):
+        pdf_path = bytes(pdf_path)  # memoryviews and mmaps cannot be sent to workers
+    tracer = active_tracer()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            range_extractor,
+            [pdf_path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+            [tracer is not None] * len(ranges),
+        ))
+    parts = []
+    for *part, events in results:
+        if events:
+            tracer.events.extend(events)
+        parts.append(tuple(part))
+    return parts
+
+
+def extract_span_table(pdf_path, workers=1, registry=None, stats=None):
+    """
+    Extract every text span of the document in page order into a SpanTable
+    whose styles are interned in `registry` (a fresh StyleRegistry by
+    default). Pages without a text layer are skipped (see page_has_text); a
+    `stats` dict receives the "pages" and "skipped_pages" counts.
+    With workers > 1, large documents are split into page ranges that are
+    extracted in separate processes and stitched back together in order.
+    """
+    doc = open_pdf(pdf_path)
+    page_count = doc.page_count
+
+    if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+        builder, skipped = SpanTableBuilder(registry), [0]
+        for page_num, page in _text_pages(doc, 0, page_count, skipped):
+            add_page_rows(builder, page, page_num)
+        doc.close()
+        _record_pages(stats, page_count, skipped[0])
+        return builder.build()
+
+    doc.close()
+    parts = _extract_parallel(extract_page_range_table, pdf_path, page_count, workers)
+    _record_pages(stats, page_count, sum(skipped for _, skipped in parts))
+    return SpanTable.concat([table for table, _ in parts], registry)
+
+
+def extract_pdf_content(pdf_path, workers=1, registry=None, stats=None):
+    """extract_span_table as a list of span dicts, each style tagged with its id."""
+    return extract_span_table(pdf_path, workers, registry, stats).to_spans()
+
+
+def iter_pdf_pages(pdf_path, registry=None, stats=None):
+    """iter_page_tables as span dict lists."""
+    for table in iter_page_tables(pdf_path, registry, stats):
+        yield table.to_spans()
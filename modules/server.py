@@ -0,0 +1,218 @@
+# modules/server.py
+
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from modules.pipeline import _warm_worker, process_pdf
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_MAX_BODY = 64 * 1024 * 1024  # bytes
+DEFAULT_TIMEOUT = 120.0  # seconds
+
+
+def _outline_task(pdf_bytes, options):
+    # Runs in a pool worker; errors travel back as a message instead of a
+    # (possibly unpicklable) exception.
+    try:
+        return process_pdf(pdf_bytes, **options), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
+class OutlineService:
+    """
+    Process pool plus admission control for the HTTP front end.
+    At most `workers` documents are processed at once and at most
+    `queue_size` more wait for a worker; requests beyond that are refused
+    straight away instead of growing the backlog (and the tail latency).
+    A pool broken by a dying worker is replaced on the next submit; the
+    requests that were in flight on it fail with BrokenProcessPool.
+    """
+
+    def __init__(self, workers=None, queue_size=None, timeout=DEFAULT_TIMEOUT, options=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.options = dict(options or {})  # extra process_pdf keyword arguments
+        self.queue_size = self.workers * 2 if queue_size is None else queue_size
+        self.timeout = timeout
+        self.executor = self._new_executor()
+        self._executor_lock = threading.Lock()
+        self._broken_executor = None  # the pool a BrokenProcessPool came from
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+
+    def pool_broken(self):
+        return self._broken_executor is self.executor
+
+    def _mark_broken(self, executor):
+        # Ignores reports from a pool that has already been replaced.
+        with self._executor_lock:
+            if executor is self.executor:
+                self._broken_executor = executor
+
+    def _replace_executor(self, broken):
+        """Swap in a fresh pool unless another thread already replaced `broken`."""
+        with self._executor_lock:
+            if self.executor is not broken:
+                return
+            self.executor = self._new_executor()
+            self._broken_executor = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def in_flight(self):
+        with self._lock:
+            return self.admitted - self.completed
+
+    def stats(self):
+        in_flight = self.in_flight()
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": in_flight,
+            "queued": max(0, in_flight - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "pool_broken": self.pool_broken(),
+            "pool_restarts": self.restarts,
+        }
+
+    def submit(self, pdf_bytes):
+        """
+        Future of (final_output, error), or None when the queue is full.
+        Raises BrokenProcessPool when the pool broke during the submit; it
+        has been replaced by then, so the request can be retried.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return None
+        with self._lock:
+            self.admitted += 1
+        executor = self.executor
+        if self.pool_broken():
+            self._replace_executor(executor)
+            executor = self.executor
+        try:
+            future = executor.submit(_outline_task, pdf_bytes, self.options)
+        except BrokenProcessPool:
+            self._release()
+            self._mark_broken(executor)
+            self._replace_executor(executor)
+            raise
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda done: self._finished(executor, done))
+        return future
+
+    def _finished(self, executor, future):
+        self._release()
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._mark_broken(executor)
+
+    def _release(self):
+        with self._lock:
+            self.completed += 1
+        self._slots.release()
+
+    def close(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+class OutlineRequestHandler(BaseHTTPRequestHandler):
+    """POST /outline with the PDF as the body; GET /health for queue stats."""
+
+    server_version = "OutlineService/1"
+    max_body = DEFAULT_MAX_BODY
+
+    def _send_json(self, status, payload, headers=()):
+        body = json.dumps(payload, indent=2).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        stats = self.server.service.stats()
+        self._send_json(503 if stats["pool_broken"] else 200, stats)
+
+    def do_POST(self):
+        if self.path != "/outline":
+            self._send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self._send_json(411, {"error": "Content-Length required"})
+            return
+        if length <= 0 or length > self.max_body:
+            self._send_json(413, {"error": f"body must be 1..{self.max_body} bytes"})
+            return
+        pdf_bytes = self.rfile.read(length)
+
+        service = self.server.service
+        try:
+            future = service.submit(pdf_bytes)
+        except BrokenProcessPool:
+            self._send_json(503, {"error": "worker pool restarting"}, headers=[("Retry-After", "1")])
+            return
+        if future is None:
+            self._send_json(503, {"error": "queue full"}, headers=[("Retry-After", "1")])
+            return
+        try:
+            final_output, error = future.result(timeout=service.timeout)
+        except FutureTimeout:
+            future.cancel()  # frees the slot if it never reached a worker
+            self._send_json(504, {"error": "processing timed out"})
+            return
+        except BrokenProcessPool:
+            self._send_json(503, {"error": "worker died; pool restarting"}, headers=[("Retry-After", "1")])
+            return
+        except Exception as e:  # e.g. a worker died
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if error is not None:
+            self._send_json(422, {"error": error})
+            return
+        self._send_json(200, final_output)
+
+    def log_message(self, format, *args):
+        pass  # keep request logging off the hot path
+
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, queue_size=None,
+                timeout=DEFAULT_TIMEOUT, options=None):
+    server = ThreadingHTTPServer((host, port), OutlineRequestHandler)
+    server.daemon_threads = True
+    server.service = OutlineService(workers, queue_size, timeout, options)
+    return server
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, queue_size=None, timeout=DEFAULT_TIMEOUT,
+          options=None):
+    """Serve outlines over HTTP until interrupted; options are passed to process_pdf."""
+    server = make_server(host, port, workers, queue_size, timeout, options)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.service.close()
@@ -0,0 +1,136 @@
+import numpy as np
+
+from modules.styles import StyleRegistry
+
+
+class SpanTable:
+    """
+    Column-oriented storage for extracted spans.
+    Numeric attributes live in one NumPy array each, styles are interned
+    into the `styles` StyleRegistry (the `style` column holds their ids) and
+    texts are kept in a plain list. Row i is the i-th extracted span;
+    span(i) / to_spans() build its dict form (as returned by
+    scraper.extract_pdf_content).
+    """
+
+    NUMERIC_COLUMNS = ("page", "x", "y", "width", "height", "size", "flags", "style")
+
+    def __init__(self, columns, styles, texts):
+        self.page = columns["page"]
+        self.x = columns["x"]
+        self.y = columns["y"]
+        self.width = columns["width"]
+        self.height = columns["height"]
+        self.size = columns["size"]
+        self.flags = columns["flags"]
+        self.style = columns["style"]
+        self.styles = styles
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.texts)
+
+    def column(self, name):
+        return getattr(self, name)
+
+    def span(self, i):
+        style_id = int(self.style[i])
+        font, size, color, bold, italic, serif = self.styles[style_id]
+        x, y = int(self.x[i]), int(self.y[i])
+        width, height = int(self.width[i]), int(self.height[i])
+        return {
+            "text": self.texts[i],
+            "styles_used": [{
+                "font": font,
+                "size": size,
+                "color": color,
+                "font_flags": {
+                    "bold": bold,
+                    "italic": italic,
+                    "serif": serif,
+                },
+                "style_id": style_id
+            }],
+            "position": {
+                "x": x,
+                "y": y,
+                "width": width,
+                "height": height
+            },
+            "bbox": [x, y, x + width, y + height],
+            "page_number": int(self.page[i])
+        }
+
+    def to_spans(self):
+        return [self.span(i) for i in range(len(self))]
+
+    def slice(self, start, stop):
+        columns = {name: self.column(name)[start:stop] for name in self.NUMERIC_COLUMNS}
+        return SpanTable(columns, self.styles, self.texts[start:stop])
+
+    def iter_pages(self):
+        """Yield one table view per page; rows are stored in page order."""
+        if not len(self):
+            return
+        bounds = [0] + (np.flatnonzero(np.diff(self.page)) + 1).tolist() + [len(self)]
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            yield self.slice(start, stop)
+
+    @classmethod
+    def concat(cls, tables, registry=None):
+        """Concatenate tables in order, re-interning their style columns."""
+        builder = SpanTableBuilder(registry)
+        columns = {name: [] for name in cls.NUMERIC_COLUMNS}
+        texts = []
+        for table in tables:
+            remap = np.array([builder.styles.intern(key) for key in table.styles] or [0], dtype=np.int32)
+            for name in cls.NUMERIC_COLUMNS:
+                values = table.column(name)
+                columns[name].append(remap[values] if name == "style" else values)
+            texts.extend(table.texts)
+        columns = {
+            name: np.concatenate(parts) if parts else np.zeros(0, dtype=np.int32)
+            for name, parts in columns.items()
+        }
+        return cls(columns, builder.styles, texts)
+
+    @classmethod
+    def from_spans(cls, spans, registry=None):
+        builder = SpanTableBuilder(registry)
+        for span in spans:
+            style = span["styles_used"][0]
+            flags = style["font_flags"]
+            pos = span["position"]
+            builder.add(
+                span["page_number"], pos["x"], pos["y"], pos["width"], pos["height"],
+                style["size"],
+                (2 if flags["bold"] else 0) | (1 if flags["italic"] else 0) | (4 if flags["serif"] else 0),
+                style["font"], style["color"], span["text"],
+            )
+        return builder.build()
+
+
+class SpanTableBuilder:
+    """Accumulates rows in Python lists and freezes them into a SpanTable."""
+
+    def __init__(self, registry=None):
+        self.rows = {name: [] for name in SpanTable.NUMERIC_COLUMNS}
+        self.texts = []
+        self.styles = registry if registry is not None else StyleRegistry()
+
+    def add(self, page, x, y, width, height, size, flags, font, color, text):
+        style = (font, size, color, bool(flags & 2), bool(flags & 1), bool(flags & 4))
+        rows = self.rows
+        rows["page"].append(page)
+        rows["x"].append(x)
+        rows["y"].append(y)
+        rows["width"].append(width)
+        rows["height"].append(height)
+        rows["size"].append(size)
+        rows["flags"].append(flags)
+        rows["style"].append(self.styles.intern(style))
+        self.texts.append(text)
+
+    def build(self):
+        columns = {name: np.array(values, dtype=np.int32) for name, values in self.rows.items()}
+        return SpanTable(columns, self.styles, self.texts)
@@ -0,0 +1,26 @@
+# modules/spatial.py
+
+from bisect import bisect_left, bisect_right
+
+
+class PageIndex:
+    """
+    Y-interval index over the spans of one page, which must be ordered by
+    y (as merge_engine.page_runs returns them). Queries bisect the sorted
+    tops and answer with a (start, stop) range into `spans`, so finding the
+    spans on a line or in the band directly below one costs O(log n)
+    instead of a scan. Lines span the full page width in this pipeline, so
+    the queries do not filter on x.
+    """
+
+    def __init__(self, spans):
+        self.spans = spans
+        self.tops = [span["position"]["y"] for span in spans]
+
+    def same_line(self, i, tolerance):
+        """Range of the spans from i on whose top is at most tolerance below span i's."""
+        return i, bisect_right(self.tops, self.tops[i] + tolerance, i)
+
+    def below(self, bottom, max_gap):
+        """Range of the spans whose top lies 0..max_gap below `bottom`."""
+        return bisect_left(self.tops, bottom), bisect_right(self.tops, bottom + max_gap)
@@ -0,0 +1,106 @@
+from collections import namedtuple
+
+# Font-name fragments that mark a styled (heavier / slanted / narrow) face.
+STYLED_NAME_TERMS = (
+    "bold", "black", "heavy", "oblique", "italic",
+    "narrow", "semi", "demi", "compressed", "condensed"
+)
+
+# Precomputed per-style attributes:
+# styled: bold or italic flag, or a styled face name (see STYLED_NAME_TERMS)
+# shape:  (size, font, bold, italic), the key hierarchy levels are built on
+StyleTraits = namedtuple("StyleTraits", ["bold", "italic", "serif", "styled", "shape"])
+
+
+def style_key(style):
+    """(font, size, color, bold, italic, serif) of a style dict."""
+    flags = style.get("font_flags", {})
+    return (
+        style.get("font", ""),
+        style.get("size", 0),
+        style.get("color", 0),
+        flags.get("bold", False),
+        flags.get("italic", False),
+        flags.get("serif", False),
+    )
+
+
+def _traits(key):
+    font, size, _, bold, italic, serif = key
+    font_name = font.lower()
+    styled = bold or italic or any(term in font_name for term in STYLED_NAME_TERMS)
+    return StyleTraits(bold, italic, serif, styled, (size, font, bold, italic))
+
+
+class StyleRegistry:
+    """
+    Per-document interning of styles. Every distinct (font, size, color,
+    bold, italic, serif) gets a small integer id, which extraction stores on
+    each style dict as "style_id"; stages compare styles by id and look up
+    precomputed traits instead of re-deriving them from the dict.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.traits = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, style_id):
+        return self.keys[style_id]
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def intern(self, key):
+        style_id = self._ids.get(key)
+        if style_id is None:
+            style_id = self._ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.traits.append(_traits(key))
+        return style_id
+
+    def id_of(self, style):
+        """Id of a style dict, interning (and tagging) it when it has none."""
+        style_id = style.get("style_id")
+        if style_id is None:
+            style_id = style["style_id"] = self.intern(style_key(style))
+        return style_id
+
+    def traits_of(self, style):
+        return self.traits[self.id_of(style)]
+
+    def annotate(self, spans):
+        """Tag every style of every span with its id."""
+        for span in spans:
+            for style in span.get("styles_used", []):
+                style["style_id"] = self.intern(style_key(style))
+        return spans
+
+    @classmethod
+    def from_spans(cls, spans):
+        """
+        Rebuild the registry of an already tagged span list (e.g. loaded
+        from JSON); styles without an id are interned and tagged.
+        """
+        registry = cls()
+        pending = []
+        for span in spans:
+            for style in span.get("styles_used", []):
+                style_id = style.get("style_id")
+                if style_id is None:
+                    pending.append(style)
+                    continue
+                while len(registry.keys) <= style_id:
+                    registry.keys.append(None)
+                    registry.traits.append(None)
+                if registry.keys[style_id] is None:
+                    key = style_key(style)
+                    registry.keys[style_id] = key
+                    registry.traits[style_id] = _traits(key)
+                    registry._ids[key] = style_id
+        for style in pending:
+            registry.id_of(style)
+        return registry
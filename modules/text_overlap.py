@@ -0,0 +1,90 @@
+# modules/text_overlap.py
+
+# Prefix length of `b` used to reject candidate positions before a full
+# comparison.
+HEAD_LENGTH = 8
+# Full comparisons may touch at most this many times the compared length;
+# past that the candidates are cut down to overlaps no longer than the
+# longest prefix of `b` found in `a` (a binary search of O(log n) substring
+# searches, O(n log n)), and if the budget runs out again the remaining
+# positions are resolved with the linear prefix function. Highly periodic
+# text therefore costs O(n log n) at worst instead of the quadratic scan.
+VERIFY_BUDGET = 4
+
+
+def overlap_length(a, b):
+    """
+    Length of the longest suffix of `a` that is also a prefix of `b`.
+    Same result as trying every length from min(len(a), len(b)) down with
+    a.endswith(b[:j]), in O(n log n) time at worst (linear unless the
+    VERIFY_BUDGET fallbacks are reached).
+    """
+    n = min(len(a), len(b))
+    if n == 0:
+        return 0
+
+    tail = a[len(a) - n:]
+    if b.startswith(tail):
+        return n
+
+    head = b[:HEAD_LENGTH]
+    end = tail[n - HEAD_LENGTH:]
+    budget = VERIFY_BUDGET * n
+    bounded = False
+
+    # Candidate starts in `tail`, leftmost (= longest overlap) first. A
+    # candidate must match `b` on its first and last HEAD_LENGTH characters
+    # before it is compared in full.
+    i = tail.find(b[0], 1)
+    while i != -1:
+        rest = n - i
+        if rest <= HEAD_LENGTH or (tail.startswith(head, i) and b.endswith(end, 0, rest)):
+            if b.startswith(tail[i:]):
+                return rest
+            budget -= rest
+            if budget < 0:
+                if bounded:
+                    return _prefix_function_overlap(tail[i + 1:], b)
+                bounded = True
+                budget = VERIFY_BUDGET * n
+                i = max(i, n - _longest_prefix_in(tail[i + 1:], b, rest - 1) - 1)
+        i = tail.find(b[0], i + 1)
+    return 0
+
+
+def _longest_prefix_in(text, pattern, limit):
+    """Largest length <= limit whose pattern prefix occurs in text (binary search over C-level finds)."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if pattern[:mid] in text:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _prefix_function_overlap(text, pattern):
+    """KMP: longest suffix of `text` that is a prefix of `pattern`."""
+    n = min(len(text), len(pattern))
+    if n == 0:
+        return 0
+    pattern = pattern[:n]
+
+    fail = [0] * n
+    k = 0
+    for i in range(1, n):
+        ch = pattern[i]
+        while k and ch != pattern[k]:
+            k = fail[k - 1]
+        if ch == pattern[k]:
+            k += 1
+        fail[i] = k
+
+    k = 0
+    for ch in text[len(text) - n:]:
+        while k and ch != pattern[k]:
+            k = fail[k - 1]
+        if ch == pattern[k]:
+            k += 1
+    return k
@@ -24,7 +24,10 @@ def merge_simultaneous_entries(entries):
     seen_signatures = set()
     for entry in entries:
         for style in entry.get("styles_used", []):
-            sig = json.dumps(style, sort_keys=True)
+            if "style_id" in style:
+                sig = (style["style_id"], style.get("occurrences"))
+            else:
+                sig = json.dumps(style, sort_keys=True)
             if sig not in seen_signatures:
                 seen_signatures.add(sig)
                 all_styles.append(style)
@@ -180,33 +183,42 @@ def extract_title_precise(data):
         "title_entry": title_entry
     }
 
+def mark_title(data):
+    """
+    Flag the detected title entry in an in-memory span list, inserting a
+    merged entry at the front when the title spans several entries.
+    """
+    result = extract_title_precise(data)
+    title_entry = result.get("title_entry")
+
+    if title_entry:
+        matched_text = title_entry.get("text", "").strip()
+        matched_bbox = title_entry.get("bbox", [])
+        matched_page = title_entry.get("page_number", 1)
+
+        matched = False
+        for entry in data:
+            if (
+                entry.get("text", "").strip() == matched_text and
+                entry.get("bbox") == matched_bbox and
+                entry.get("page_number", 1) == matched_page
+            ):
+                entry["is_title"] = True
+                matched = True
+                break
+
+        if not matched:
+            title_entry["is_title"] = True
+            data.insert(0, title_entry)
+
+    return data
+
 def process_title_extraction(json_path, output_dir=None):
     try:
         with open(json_path, "r", encoding="utf-8") as f:
             data = json.load(f)
 
-        result = extract_title_precise(data)
-        title_entry = result.get("title_entry")
-
-        if title_entry:
-            matched_text = title_entry.get("text", "").strip()
-            matched_bbox = title_entry.get("bbox", [])
-            matched_page = title_entry.get("page_number", 1)
-
-            matched = False
-            for entry in data:
-                if (
-                    entry.get("text", "").strip() == matched_text and
-                    entry.get("bbox") == matched_bbox and
-                    entry.get("page_number", 1) == matched_page
-                ):
-                    entry["is_title"] = True
-                    matched = True
-                    break
-
-            if not matched:
-                title_entry["is_title"] = True
-                data.insert(0, title_entry)
+        mark_title(data)
 
         with open(json_path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2)
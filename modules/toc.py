@@ -0,0 +1,71 @@
+# modules/toc.py
+
+import re
+
+from modules.scraper import open_pdf
+
+# Quality bar for trusting an embedded outline (bookmarks) over the heuristics.
+MIN_TOC_ENTRIES = 2
+# The entries must reach at least this far into the document...
+MIN_TOC_COVERAGE = 0.5
+# ...unless it is this short, where a TOC on the first pages is normal.
+SHORT_DOCUMENT_PAGES = 4
+
+# Metadata titles that are file names or generator noise rather than titles.
+JUNK_TITLE = re.compile(r"(\.(pdf|docx?|pptx?|xlsx?|indd|tex)$)|^(microsoft \w+ - |untitled)", re.IGNORECASE)
+
+
+def check_toc(toc, page_count):
+    """
+    Reason the embedded TOC is unusable, or None when it passes:
+    enough non-empty entries, levels that start at 1 and never skip a level
+    going down, pages that exist and never go backwards, and entries that
+    cover most of the document.
+    """
+    if len(toc) < MIN_TOC_ENTRIES:
+        return "too few entries"
+
+    previous_level, previous_page = 0, 1
+    for level, text, page, *_ in toc:
+        if not text.strip():
+            return "empty entry"
+        if level < 1 or level > previous_level + 1:
+            return "level jump"
+        if not 1 <= page <= page_count:
+            return "page out of range"
+        if page < previous_page:
+            return "pages out of order"
+        previous_level, previous_page = level, page
+
+    if page_count > SHORT_DOCUMENT_PAGES and previous_page < MIN_TOC_COVERAGE * page_count:
+        return "low coverage"
+    return None
+
+
+def metadata_title(metadata):
+    title = " ".join((metadata or {}).get("title", "").split())
+    return "" if JUNK_TITLE.search(title) else title
+
+
+def toc_output(pdf_path):
+    """
+    Final {"title", "outline"} object built from the PDF's bookmarks and
+    metadata, or None when the TOC fails check_toc. Pages are 0-based, as
+    in the heuristic pipeline's output.
+    """
+    doc = open_pdf(pdf_path)
+    try:
+        toc = doc.get_toc(simple=True)
+        if check_toc(toc, doc.page_count) is not None:
+            return None
+        title = metadata_title(doc.metadata)
+    finally:
+        doc.close()
+
+    return {
+        "title": title,
+        "outline": [
+            {"level": f"H{level}", "text": " ".join(text.split()), "page": page - 1}
+            for level, text, page, *_ in toc
+        ],
+    }
@@ -0,0 +1,76 @@
+# modules/tracing.py
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+_active_tracer = ContextVar("active_tracer", default=None)
+
+
+def _now_us():
+    # CLOCK_MONOTONIC is shared by all processes, so pool workers line up.
+    return time.perf_counter_ns() / 1000
+
+
+class Tracer:
+    """
+    Collects Trace Event Format "complete" events (as loaded by Perfetto and
+    chrome://tracing). While activated, trace_span() calls anywhere in the
+    pipeline record into it; otherwise they cost a context-variable lookup.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.pid = os.getpid()
+
+    @contextmanager
+    def activate(self):
+        token = _active_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _active_tracer.reset(token)
+
+    @contextmanager
+    def span(self, name, cat, args=None):
+        start = _now_us()
+        try:
+            yield
+        finally:
+            event = {
+                "name": name, "cat": cat, "ph": "X", "ts": start, "dur": _now_us() - start,
+                "pid": self.pid, "tid": threading.get_ident(),
+            }
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+
+def active_tracer():
+    """The Tracer activated in this context, or None."""
+    return _active_tracer.get()
+
+
+def trace_span(name, cat, **args):
+    """Context manager recording name/cat/args into the active Tracer, if any."""
+    tracer = _active_tracer.get()
+    if tracer is None:
+        return nullcontext()
+    return tracer.span(name, cat, args)
+
+
+def write_trace(events, path):
+    """Write events as a Trace Event Format JSON file, naming each worker process."""
+    pids = sorted({event["pid"] for event in events})
+    metadata = [
+        {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": f"worker {pid}"}}
+        for pid in pids
+    ]
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,101 @@
+# modules/watcher.py
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from modules.pipeline import INPUT_DIR, OUTPUT_DIR, _process_pdf_task, _warm_worker
+
+# A file whose runs keep breaking the pool is given up on after this many.
+MAX_BROKEN_POOL_RETRIES = 2
+
+
+def _snapshot(input_dir):
+    """{pdf filename: (size, mtime_ns)} of the PDFs currently in input_dir."""
+    snapshot = {}
+    for entry in os.scandir(input_dir):
+        if entry.is_file() and entry.name.lower().endswith(".pdf"):
+            stat = entry.stat()
+            snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def _start_pool(jobs):
+    # Workers are only started by submits; start (and warm) all of them now
+    # so the first files dropped in do not pay for it.
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=_warm_worker)
+    wait([executor.submit(os.getpid) for _ in range(jobs)])
+    return executor
+
+
+def watch_folder(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, jobs=None, interval=0.5, options=None,
+                 on_result=None, stop=None):
+    """
+    Poll input_dir and process every new or modified PDF in a pool of
+    pre-warmed worker processes that lives for the whole session.
+    A file is submitted once its size and mtime are unchanged across two
+    polls, so PDFs that are still being copied in are not picked up early.
+    on_result(pdf_filename, success) is called as documents finish; the loop
+    runs until stop (a threading.Event) is set or the process is interrupted.
+    Files that were in flight when a worker died are resubmitted on the next
+    poll, and a file that is deleted and added again is processed again.
+    """
+    options = dict(options or {})
+    jobs = jobs or os.cpu_count() or 1
+    seen = {}       # last observed signature per file
+    processed = {}  # signature each file was last submitted with
+    running = {}    # future -> pdf filename
+    crashes = {}    # pdf filename -> runs lost to a broken pool
+
+    os.makedirs(input_dir, exist_ok=True)
+    executor = _start_pool(jobs)
+    try:
+        while stop is None or not stop.is_set():
+            snapshot = _snapshot(input_dir)
+            for name in list(processed):
+                if name not in snapshot:
+                    del processed[name]
+                    crashes.pop(name, None)
+            busy = set(running.values())
+            for name, signature in snapshot.items():
+                if seen.get(name) != signature or processed.get(name) == signature or name in busy:
+                    continue
+                processed[name] = signature
+                try:
+                    future = executor.submit(_process_pdf_task, name, input_dir, output_dir, options)
+                except BrokenProcessPool:
+                    # A worker died (e.g. a crashing PDF); replace the whole pool.
+                    executor.shutdown(wait=False)
+                    executor = _start_pool(jobs)
+                    future = executor.submit(_process_pdf_task, name, input_dir, output_dir, options)
+                running[future] = name
+            seen = snapshot
+
+            deadline = time.monotonic() + interval
+            while running:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        success = future.result()[0]
+                    except BrokenProcessPool:
+                        # Possibly another file's crash; retry on the next poll.
+                        success = False
+                        crashes[name] = crashes.get(name, 0) + 1
+                        if crashes[name] <= MAX_BROKEN_POOL_RETRIES:
+                            processed.pop(name, None)
+                    except Exception:
+                        success = False
+                    else:
+                        crashes.pop(name, None)
+                    if on_result is not None:
+                        on_result(name, success)
+            remaining = deadline - time.monotonic()
+            if remaining > 0:
+                time.sleep(remaining)
+    finally:
+        executor.shutdown(cancel_futures=True)
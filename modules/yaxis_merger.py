@@ -1,15 +1,44 @@
 from collections import defaultdict
 import json
 
+from modules.text_overlap import overlap_length
+
 def _merge_text_overlap(a: str, b: str) -> tuple[str, int]:
     """
     Merge two strings, removing overlap between end of `a` and start of `b`.
     """
-    max_ov = min(len(a), len(b))
-    for j in range(max_ov, 0, -1):
-        if a.endswith(b[:j]):
-            return a + b[j:], j
-    return a + b, 0
+    j = overlap_length(a, b)
+    return a + b[j:], j
+
+def merge_run(run, in_place=False):
+    """
+    One span for a run of x-sorted, same-font spans on one line: the texts
+    joined without their overlaps, the x extent widened over the run.
+    """
+    merged_text = run[0]['text']
+    for r in run[1:]:
+        merged_text, _ = _merge_text_overlap(merged_text, r['text'])
+
+    style = run[0]['styles_used'][0]
+    base = run[0] if in_place else run[0].copy()
+    base.update({
+        'text': merged_text,
+        'styles_used': [style],
+        'lines': len(run),
+    })
+    if len(run) == 1:
+        xmin = base['position']['x']
+        xmax = xmin + base['position']['width']
+    else:
+        xs = [r['position']['x'] for r in run]
+        ws = [r['position']['width'] for r in run]
+        xmin = min(xs)
+        xmax = max(x + w for x, w in zip(xs, ws))
+    base['position']['x'] = xmin
+    base['position']['width'] = xmax - xmin
+    base['bbox'][0] = xmin
+    base['bbox'][2] = xmax
+    return base
 
 def merge_on_yaxis_preserve_styles(data):
     """
@@ -32,51 +61,11 @@ def merge_on_yaxis_preserve_styles(data):
             if curr_font == prev_font:
                 run.append(span)
             else:
-                # Merge current run
-                merged_text = run[0]['text']
-                for r in run[1:]:
-                    merged_text, _ = _merge_text_overlap(merged_text, r['text'])
-
-                style = run[0]['styles_used'][0]
-                base = run[0].copy()
-                base.update({
-                    'text': merged_text,
-                    'styles_used': [style],
-                    'lines': len(run),
-                })
-                xs = [r['position']['x'] for r in run]
-                ws = [r['position']['width'] for r in run]
-                xmin = min(xs)
-                xmax = max(x + w for x, w in zip(xs, ws))
-                base['position']['x'] = xmin
-                base['position']['width'] = xmax - xmin
-                base['bbox'][0] = xmin
-                base['bbox'][2] = xmax
-                merged.append(base)
-
+                merged.append(merge_run(run))
                 run = [span]
 
         # Final flush
-        merged_text = run[0]['text']
-        for r in run[1:]:
-            merged_text, _ = _merge_text_overlap(merged_text, r['text'])
-
-        style = run[0]['styles_used'][0]
-        base = run[0].copy()
-        base.update({
-            'text': merged_text,
-            'styles_used': [style],
-            'lines': len(run),
-        })
-        xs = [r['position']['x'] for r in run]
-        ws = [r['position']['width'] for r in run]
-        xmin = min(xs)
-        xmax = max(x + w for x, w in zip(xs, ws))
-        base['position']['x'] = xmin
-        base['position']['width'] = xmax - xmin
-        base['bbox'][0] = xmin
-        base['bbox'][2] = xmax
-        merged.append(base)
+        merged.append(merge_run(run))
 
     return merged
 